@@ -6,7 +6,7 @@ import typing
 from nylib import ctype
 from .utils import AssetType
 from .instance_object import get_instance_object_from_addr
-from ..utils import find_binary_by_chunk_id, offset_string
+from ..utils import find_binary_by_chunk_id, offset_string, cached_by_path
 
 if typing.TYPE_CHECKING:
     from fps.utils.sqpack import SqPack
@@ -95,20 +95,18 @@ class LayerGroup(ctype.Struct):
 
     @classmethod
     def get(cls, sq_pack: 'SqPack', path) -> 'LayerGroup|None':
-        if (c := getattr(sq_pack, '__cached_layer_group', None)) is None:
-            setattr(sq_pack, '__cached_layer_group', c := {})
-        if path not in c:
+        def load():
             try:
                 buf = memoryview(sq_pack.pack.get_file(path).data_buffer)
             except FileNotFoundError:
                 _logger.warning(f'file not found {path}')
-                c[path] = res = None
-            else:
-                # c[path] = res = cls.from_buffer(find_binary_by_chunk_id(buf, b'LGP1', b'LGB1'))
-                c[path] = res = ctype.cdata_from_buffer(find_binary_by_chunk_id(buf, b'LGP1', b'LGB1'), cls)
-                res.path = path
-            return res
-        return c[path]
+                return None, len(path)
+            # res = cls.from_buffer(find_binary_by_chunk_id(buf, b'LGP1', b'LGB1'))
+            res = ctype.cdata_from_buffer(find_binary_by_chunk_id(buf, b'LGP1', b'LGB1'), cls)
+            res.path = path
+            return res, len(buf)
+
+        return cached_by_path(sq_pack, 'layer_group', path, load)
 
     @functools.cached_property
     def layers(self):
@@ -9,7 +9,7 @@ from .sg_timeline import SGTimelineFolder
 from .sg_settings import SGSettings
 from .housing_settings import HousingSettings
 from ..layer_group import LayerGroup
-from ..utils import find_binary_by_chunk_id, offset_string
+from ..utils import find_binary_by_chunk_id, offset_string, cached_by_path
 
 if typing.TYPE_CHECKING:
     from fps.utils.sqpack import SqPack
@@ -57,19 +57,17 @@ class Scene(ctype.Struct):
 
     @classmethod
     def get(cls, sq_pack: 'SqPack', path, file_id: bytes) -> 'Scene|None':
-        k = '__cached_scene_' + file_id.decode()
-        if (c := getattr(sq_pack, k, None)) is None: setattr(sq_pack, k, c := {})
-        if path not in c:
+        def load():
             try:
                 buf = memoryview(sq_pack.pack.get_file(path).data_buffer)
             except FileNotFoundError:
                 _logger.warning(f'file not found {path}')
-                c[path] = res = None
-            else:
-                c[path] = res = ctype.cdata_from_buffer(find_binary_by_chunk_id(buf, b'SCN1', file_id), cls)
-                res.path = path
-            return res
-        return c[path]
+                return None, len(path)
+            res = ctype.cdata_from_buffer(find_binary_by_chunk_id(buf, b'SCN1', file_id), cls)
+            res.path = path
+            return res, len(buf)
+
+        return cached_by_path(sq_pack, 'scene_' + file_id.decode(), path, load)
 
     _layer_groups = ctype.SField(ctype.c_int32, 0X0)
     layer_group_count = ctype.SField(ctype.c_int32, 0X4)
@@ -4,7 +4,7 @@ import struct
 import typing
 
 from nylib import ctype
-from ..utils import find_binary_by_chunk_id, offset_string
+from ..utils import find_binary_by_chunk_id, offset_string, cached_by_path
 
 if typing.TYPE_CHECKING:
     from fps.utils.sqpack import SqPack
@@ -15,13 +15,10 @@ class SharedGroup(ctype.Struct):
 
     @classmethod
     def get(cls, sq_pack: 'SqPack', path) -> 'SharedGroup':
-        if (c := getattr(sq_pack, '__cached_shared_group', None)) is None:
-            setattr(sq_pack, '__cached_shared_group', c := {})
-        if path not in c:
-            c[path] = res = cls.from_buffer(find_binary_by_chunk_id(
-                memoryview(sq_pack.pack.get_file(path).data_buffer),
-                b'SCN1', b'SGB1'
-            ))
+        def load():
+            buf = memoryview(sq_pack.pack.get_file(path).data_buffer)
+            res = cls.from_buffer(find_binary_by_chunk_id(buf, b'SCN1', b'SGB1'))
             res.path = path
-            return res
-        return c[path]
+            return res, len(buf)
+
+        return cached_by_path(sq_pack, 'shared_group', path, load)
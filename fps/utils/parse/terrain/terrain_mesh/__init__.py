@@ -1,7 +1,9 @@
 import dataclasses
 import struct
+import sys
 import typing
 from .mesh import Mesh
+from ..utils import cached_by_path
 
 if typing.TYPE_CHECKING:
     from fps.utils.sqpack import SqPack
@@ -37,10 +39,14 @@ class TerrainData:
 class TerrainMesh:
     @classmethod
     def get(cls, sq_pack: 'SqPack', path) -> 'TerrainMesh':
-        if (c := getattr(sq_pack, '__cached_terrain_mesh', None)) is None:
-            setattr(sq_pack, '__cached_terrain_mesh', c := {})
-        if path not in c: c[path] = cls(sq_pack, path)
-        return c[path]
+        def load():
+            terrain_mesh = cls(sq_pack, path)
+            # the meshes are counted by their own cache entries
+            return terrain_mesh, len(terrain_mesh.index_view) + sys.getsizeof(terrain_mesh.state_table) + sum(
+                sys.getsizeof(data) for data in terrain_mesh.state_table
+            )
+
+        return cached_by_path(sq_pack, 'terrain_mesh', path, load)
 
     def __init__(self, sq_pack: 'SqPack', terrain_path: bytes):
         self.sq_pack = sq_pack
@@ -1,6 +1,8 @@
+import sys
 import typing
 import struct
 from .node import NodeV1, NodeV0
+from ...utils import cached_by_path
 
 if typing.TYPE_CHECKING:
     from fps.utils.sqpack import SqPack
@@ -19,11 +21,11 @@ class Mesh:
 
     @classmethod
     def get(cls, sq_pack: 'SqPack', path) -> 'Mesh':
-        if (c := getattr(sq_pack, '__cached_pcb_mesh', None)) is None:
-            setattr(sq_pack, '__cached_pcb_mesh', c := {})
-        if path not in c:
-            c[path] = cls(sq_pack, path)
-        return c[path]
+        def load():
+            mesh = cls(sq_pack, path)
+            return mesh, mesh.memory_size()
+
+        return cached_by_path(sq_pack, 'pcb_mesh', path, load)
 
     def __init__(self, sq_pack: 'SqPack', mesh_path: bytes):
         self.path = mesh_path
@@ -39,6 +41,15 @@ class Mesh:
         else:
             raise NotImplementedError(f'unknown version {version}')
 
+    def memory_size(self) -> int:
+        # the file buffer is not kept, only the parsed nodes; every vertex / polygon of a kind has the same size
+        size = sys.getsizeof(self.nodes)
+        for node in self.nodes:
+            size += sys.getsizeof(node) + sys.getsizeof(node.vertex) + sys.getsizeof(node.polygons)
+            if node.vertex: size += len(node.vertex) * sys.getsizeof(node.vertex[0])
+            if node.polygons: size += len(node.polygons) * sys.getsizeof(node.polygons[0])
+        return size
+
     def __add_node(self, _node: NodeV1 | NodeV0):
         if _node.vertex or _node.polygons:
             self.nodes.append(_node)
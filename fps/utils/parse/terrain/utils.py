@@ -1,10 +1,14 @@
 import ctypes
 import struct
+import typing
 
 from glm import vec3
 
 from nylib import ctype
 
+if typing.TYPE_CHECKING:
+    from fps.utils.sqpack import SqPack
+
 
 class Color(ctype.Struct):
     _size_ = 0X4
@@ -45,3 +49,9 @@ def vec3_from_buffer(buf, off):
 
 def offset_string(name):
     return property(lambda self: ctypes.string_at(self._address_ + getattr(self, name)))
+
+
+def cached_by_path(sq_pack: 'SqPack', kind: str, path, factory: typing.Callable[[], tuple[typing.Any, int]]):
+    # parsed objects have their own byte-capped cache on the pack manager, apart from the decoded files,
+    # factory returns (value, size) with size the memory the value keeps alive
+    return sq_pack.pack.parsed_cache.get_or_create((kind, path), factory)
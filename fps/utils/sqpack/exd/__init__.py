@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING, Set, Dict, Type, TypeVar
 from logging import getLogger
 from .row import DataRow
 from .sheet import Sheet
+from .query import col
 from ..utils import Language
 
 if TYPE_CHECKING:
@@ -16,9 +17,10 @@ class ExdManager:
     exd_pack: 'Pack | None' = None
     logger = getLogger('SqPack/ExdManager')
 
-    def __init__(self, pack: 'PackManager', default_language: Language = Language.en, res_path=b"exd/root.exl", exd_keep_in_memory=True):
+    def __init__(self, pack: 'PackManager', default_language: Language = Language.en, res_path=b"exd/root.exl", exd_keep_in_memory=True, index_cache_dir=None):
         self.default_language = default_language
         self.exd_keep_in_memory = exd_keep_in_memory
+        self.index_cache_dir = index_cache_dir  # where Sheet.build_index keeps its indexes, None to keep them in memory only
         self.sheets = {}
         self.pack = pack
         self.logger.debug('init exd with language %s', self.default_language.name)
@@ -0,0 +1,118 @@
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from ..utils import get_numpy
+from .columnar import StringColumn
+
+if TYPE_CHECKING:
+    import numpy
+    from .sheet import LangSheet
+    from .row import DataRow
+
+logger = logging.getLogger('SqPack/ExdIndex')
+
+INDEX_FILE_VERSION = 1
+
+
+class ColumnIndex:
+    """
+    value -> row keys multimap of one column of a sheet in one language
+
+    keys are row ids, or (row id, sub row id) pairs for sheets with sub rows; string values are compared as str
+    """
+
+    def __init__(self, lang_sheet: 'LangSheet', col_id: int, values: 'numpy.ndarray', bounds: 'numpy.ndarray', keys: 'numpy.ndarray'):
+        # values are the distinct values, keys[bounds[i]:bounds[i + 1]] hold the rows of values[i]
+        self.lang_sheet = lang_sheet
+        self.col_id = col_id
+        self.keys = keys
+        self._groups = {value: (start, end) for value, start, end in zip(values.tolist(), bounds[:-1].tolist(), bounds[1:].tolist())}
+
+    def __repr__(self):
+        return f'ColumnIndex({self.lang_sheet}, col {self.col_id}, {len(self._groups)} values)'
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __contains__(self, value):
+        return self._normalize(value) in self._groups
+
+    @staticmethod
+    def _normalize(value):
+        if hasattr(value, 'row_base'): return int(value)  # rows are keyed by their id, as in DataRow.__eq__
+        if isinstance(value, bytes): return value.decode('utf-8', errors='ignore')
+        return value
+
+    def __getitem__(self, value) -> 'numpy.ndarray':
+        return self.get(value)
+
+    def get(self, value) -> 'numpy.ndarray':
+        if (group := self._groups.get(self._normalize(value))) is None:
+            return self.keys[:0]
+        return self.keys[group[0]:group[1]]
+
+    def values(self):
+        return self._groups.keys()
+
+    def get_rows(self, value) -> Iterator['DataRow']:
+        for key in self.get(value):
+            if self.keys.ndim == 1:
+                yield self.lang_sheet.get_row(int(key))
+            else:
+                yield self.lang_sheet.get_row(int(key[0]))[int(key[1])]
+
+
+def source_hash(lang_sheet: 'LangSheet') -> int:
+    # crc32 over the exh and every exd block of the language, an index is stale once any of them changes
+    lang_sheet.check_is_all_block_initialized()
+    crc = zlib.crc32(lang_sheet.sheet.mgr.get_exd_data(f'exd/{lang_sheet.sheet.name}.exh'))
+    for block_sheet in lang_sheet.range_to_block_sheet_map.values():
+        crc = zlib.crc32(block_sheet.buffer, crc)
+    return crc
+
+
+def index_file_path(cache_dir: Path, lang_sheet: 'LangSheet', col_id: int, crc: int):
+    return cache_dir / f'{lang_sheet.sheet.name}{lang_sheet.lang.suffix}_{col_id}_{crc:08x}.npz'
+
+
+def _group(lang_sheet: 'LangSheet', col_id: int):
+    np = get_numpy()
+    table = lang_sheet.to_columns()
+    column = table.get_column(col_id)
+    if isinstance(column, StringColumn):
+        column = np.array(['' if value is None else str(value) for value in column])
+    order = np.argsort(column, kind='stable')
+    sorted_values = column[order]
+    values, starts = np.unique(sorted_values, return_index=True)
+    return values, np.append(starts, len(sorted_values)), table.keys[order]
+
+
+def build_column_index(lang_sheet: 'LangSheet', col_id: int, cache_dir: Path | None = None) -> ColumnIndex:
+    """
+    group the rows of a sheet by the value of a column in one sort of the column array,
+    with a cache_dir the result is stored as npz keyed by the hash of the sheet files
+    """
+    np = get_numpy()
+    path = None
+    if cache_dir is not None:
+        path = index_file_path(cache_dir, lang_sheet, col_id, source_hash(lang_sheet))
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) == INDEX_FILE_VERSION:
+                    return ColumnIndex(lang_sheet, col_id, data['values'], data['bounds'], data['keys'])
+        except (OSError, KeyError, ValueError):
+            pass
+    values, bounds, keys = _group(lang_sheet, col_id)
+    if path is not None:
+        temp_path = path.with_name(f'{path.stem}.{os.getpid()}.tmp.npz')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(temp_path, version=INDEX_FILE_VERSION, values=values, bounds=bounds, keys=keys)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f'failed to write exd index {path}: {e}')
+            temp_path.unlink(missing_ok=True)
+    return ColumnIndex(lang_sheet, col_id, values, bounds, keys)
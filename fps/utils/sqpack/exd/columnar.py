@@ -0,0 +1,201 @@
+import struct
+import typing
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from ..utils import get_numpy, get_pyarrow
+from .reader import string_at
+
+if TYPE_CHECKING:
+    import numpy
+    from .sheet import LangSheet
+    from .row import DataRow
+
+STRING_COLUMN = 0x0000
+BOOL_COLUMN = 0x0001
+BIT_FIELD_COLUMN = 0x19  # 0x19 + bit offset, up to 0x20
+# numpy dtype of every fixed size column type, exd data is big endian
+COLUMN_DTYPES = {
+    0x0001: 'u1',  # bool
+    0x0002: 'i1',
+    0x0003: 'u1',
+    0x0004: '>i2',
+    0x0005: '>u2',
+    0x0006: '>i4',
+    0x0007: '>u4',
+    0x0009: '>f4',
+    0x000B: '>i8',
+}
+
+_missing = object()
+
+
+class StringColumn(typing.Sequence):
+    """
+    string column decoded on access, only the position of every value is computed up front
+    """
+
+    def __init__(self, buffers: list[bytearray], block_ids: 'numpy.ndarray', starts: 'numpy.ndarray', exd_mgr):
+        self.buffers = buffers
+        self.block_ids = block_ids
+        self.starts = starts
+        self.exd_mgr = exd_mgr
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0: i += len(self)
+        if (res := self._cache.get(i, _missing)) is _missing:
+            self._cache[i] = res = string_at(self.buffers[self.block_ids[i]], int(self.starts[i]), self.exd_mgr)
+        return res
+
+    def __repr__(self):
+        return f'StringColumn({len(self)} rows)'
+
+
+class ColumnTable:
+    """
+    every row of a sheet in one language, one array per column in column id order;
+    keys holds the row ids, or (row id, sub row id) pairs for sheets with sub rows
+
+    the fixed size part of the rows is kept as one matrix, a column is only decoded from it when first asked for
+    """
+
+    def __init__(
+            self, lang_sheet: 'LangSheet', keys: 'numpy.ndarray', rows: 'numpy.ndarray',
+            offsets: 'numpy.ndarray', block_ids: 'numpy.ndarray', buffers: list[bytearray]
+    ):
+        self.lang_sheet = lang_sheet
+        self.sheet = lang_sheet.sheet
+        self.keys = keys
+        self.rows = rows
+        self.offsets = offsets
+        self.block_ids = block_ids
+        self.buffers = buffers
+        self._columns: dict[int, 'numpy.ndarray | StringColumn'] = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return f'ColumnTable({self.lang_sheet}, {len(self)} rows, {len(self.sheet.header.columns)} columns)'
+
+    def __getitem__(self, key: int | str) -> 'numpy.ndarray | StringColumn':
+        return self.get_column(self.sheet.get_column_id(key))
+
+    def get_column(self, col_id: int) -> 'numpy.ndarray | StringColumn':
+        if (res := self._columns.get(col_id)) is None:
+            self._columns[col_id] = res = _decode_column(self, self.sheet.header.columns[col_id])
+        return res
+
+    @property
+    def columns(self) -> list['numpy.ndarray | StringColumn']:
+        return [self.get_column(col_id) for col_id in range(len(self.sheet.header.columns))]
+
+    def get_row(self, i: int) -> 'DataRow':
+        key = self.keys[i]
+        if self.keys.ndim == 1:
+            return self.lang_sheet.get_row(int(key))
+        return self.lang_sheet.get_row(int(key[0]))[int(key[1])]
+
+    def iter_rows(self, indices: Iterable[int] = None) -> Iterator['DataRow']:
+        for i in range(len(self)) if indices is None else indices:
+            yield self.get_row(i)
+
+    def to_arrow(self):
+        pa = get_pyarrow()
+        if self.keys.ndim == 1:
+            names, arrays = ['row_id'], [pa.array(self.keys)]
+        else:
+            names, arrays = ['row_id', 'sub_row_id'], [pa.array(self.keys[:, 0]), pa.array(self.keys[:, 1])]
+        column_names = self.sheet.column_names
+        for col_id, column in enumerate(self.columns):
+            names.append(column_names.get(col_id, f'col_{col_id}'))
+            if isinstance(column, StringColumn):
+                arrays.append(pa.array([None if value is None else str(value) for value in column], pa.string()))
+            else:
+                arrays.append(pa.array(column))
+        return pa.table(arrays, names=names)
+
+
+def _column_view(rows: 'numpy.ndarray', offset: int, dtype: 'numpy.dtype'):
+    # one value per row read straight from the row matrix, strided by the row size
+    np = get_numpy()
+    if not len(rows): return np.empty(0, dtype)
+    return np.ndarray((len(rows),), dtype, rows, offset, (rows.shape[1],))
+
+
+def _block_rows(block_sheet, has_sub_rows: bool, row_size: int):
+    # start of the fixed size part of every (sub) row in a block, and its key
+    offsets, keys = [], []
+    buffer = block_sheet.buffer
+    for row_id, offset in block_sheet.row_offset_map.items():
+        if not has_sub_rows:
+            offsets.append(offset + 6)
+            keys.append(row_id)
+            continue
+        _, count = struct.unpack_from('>lh', buffer, offset)
+        offset += 6
+        for _ in range(count):
+            sub_id, = struct.unpack_from('>h', buffer, offset)
+            offsets.append(offset + 2)
+            keys.append((row_id, sub_id))
+            offset += row_size + 2
+    return offsets, keys
+
+
+def build_columns(lang_sheet: 'LangSheet') -> ColumnTable:
+    """
+    gather the fixed size part of every row of a sheet with one fancy index per block,
+    columns are then strided views of the row matrix; string columns only get their positions
+    """
+    np = get_numpy()
+    sheet = lang_sheet.sheet
+    header = sheet.header.header
+    if header.subkey_count > 2:
+        raise NotImplementedError(f'{sheet.name} has nested sub rows')
+    has_sub_rows = header.subkey_count == 2
+    row_size = header.binary_data_length
+    lang_sheet.check_is_all_block_initialized()
+
+    buffers, row_chunks, block_chunks, offset_chunks, keys = [], [], [], [], []
+    row_range = np.arange(row_size)
+    for block_sheet in lang_sheet.range_to_block_sheet_map.values():
+        offsets, block_keys = _block_rows(block_sheet, has_sub_rows, row_size)
+        offsets = np.array(offsets, np.int64)
+        row_chunks.append(np.frombuffer(block_sheet.buffer, np.uint8)[offsets[:, None] + row_range])
+        block_chunks.append(np.full(len(offsets), len(buffers), np.int32))
+        offset_chunks.append(offsets)
+        keys.extend(block_keys)
+        buffers.append(block_sheet.buffer)
+    if row_chunks:
+        rows = np.ascontiguousarray(np.concatenate(row_chunks))
+        block_ids = np.concatenate(block_chunks)
+        offsets = np.concatenate(offset_chunks)
+    else:
+        rows = np.empty((0, row_size), np.uint8)
+        block_ids = np.empty(0, np.int32)
+        offsets = np.empty(0, np.int64)
+    keys = np.array(keys, np.int64).reshape((-1, 2) if has_sub_rows else (-1,))
+
+    return ColumnTable(lang_sheet, keys, rows, offsets, block_ids, buffers)
+
+
+def _decode_column(table: ColumnTable, col) -> 'numpy.ndarray | StringColumn':
+    np = get_numpy()
+    rows = table.rows
+    if col.type == STRING_COLUMN:
+        string_offsets = _column_view(rows, col.offset, np.dtype('>i4'))
+        # negative offsets stay negative so the value reads as None
+        starts = np.where(string_offsets < 0, -1, table.offsets + rows.shape[1] + string_offsets)
+        return StringColumn(table.buffers, table.block_ids, starts, table.sheet.mgr)
+    if (dtype := COLUMN_DTYPES.get(col.type)) is not None:
+        dtype = np.dtype(dtype)
+        values = _column_view(rows, col.offset, dtype).astype(dtype.newbyteorder('='))
+        return values != 0 if col.type == BOOL_COLUMN else values
+    if BIT_FIELD_COLUMN <= col.type < BIT_FIELD_COLUMN + 8:
+        return ((rows[:, col.offset] >> (col.type - BIT_FIELD_COLUMN)) & 1) > 0
+    raise NotImplementedError(f'column type 0x{col.type:X} of {table.sheet.name}')
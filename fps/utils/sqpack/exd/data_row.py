@@ -1,7 +1,6 @@
 import typing
 from typing import Generic, TypeVar, TYPE_CHECKING, Callable, Tuple, Type, Iterable
 
-from nylib.utils import Counter
 from ..utils import Language, icon_path
 
 if TYPE_CHECKING:
@@ -9,7 +8,7 @@ if TYPE_CHECKING:
     from ..pack import PackManager
 
 _T = TypeVar("_T")
-counter = Counter()
+_missing = object()
 
 
 class SimpleData(Generic[_T]):
@@ -43,7 +42,6 @@ class LinkData(Generic[_T]):
     def __init__(self, col_id: int, sheet_name):
         self.col_id = col_id
         self.sheet_name = sheet_name
-        self.cache_key = f'__cached_{counter.get()}'
 
     @classmethod
     def make(cls, sheet_name: str):
@@ -53,16 +51,18 @@ class LinkData(Generic[_T]):
         return wrapper
 
     def __get__(self, instance: 'DataRow', owner) -> _T | int | None:
-        if not hasattr(instance, self.cache_key):
-            sheet = instance.row_base.sheet.mgr.get_sheet_raw(self.sheet_name)
+        row_base = instance.row_base
+        if row_base.links is None: row_base.links = {}
+        if (item := row_base.links.get(self, _missing)) is _missing:
+            sheet = row_base.block_sheet.sheet.mgr.get_sheet_raw(self.sheet_name)
             key = instance[self.col_id]
             try:
-                lang = instance.row_base.lang_sheet.lang
+                lang = row_base.block_sheet.lang_sheet.lang
                 item = sheet.get_row(key, lang if lang.value else None)
             except KeyError:
                 item = key
-            setattr(instance, self.cache_key, item)
-        return getattr(instance, self.cache_key, None)
+            row_base.links[self] = item
+        return item
 
 
 class IconData_:
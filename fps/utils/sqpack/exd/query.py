@@ -0,0 +1,188 @@
+import operator
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from ..utils import get_numpy
+from .columnar import ColumnTable, StringColumn
+
+if TYPE_CHECKING:
+    import numpy
+    from .sheet import Sheet
+    from .row import DataRow
+    from ..utils import Language
+
+
+class Expr:
+    """
+    predicate or value over the columns of a sheet, evaluated on a whole ColumnTable at once;
+    combine predicates with &, | and ~
+    """
+
+    def evaluate(self, table: ColumnTable) -> 'numpy.ndarray':
+        raise NotImplementedError
+
+    def _compare(self, op: Callable, other) -> 'Compare':
+        return Compare(op, self, other if isinstance(other, Expr) else Literal(other))
+
+    __eq__ = lambda self, other: self._compare(operator.eq, other)
+    __ne__ = lambda self, other: self._compare(operator.ne, other)
+    __lt__ = lambda self, other: self._compare(operator.lt, other)
+    __le__ = lambda self, other: self._compare(operator.le, other)
+    __gt__ = lambda self, other: self._compare(operator.gt, other)
+    __ge__ = lambda self, other: self._compare(operator.ge, other)
+    __hash__ = None
+
+    def __and__(self, other: 'Expr'):
+        return Compare(operator.and_, self, other)
+
+    def __or__(self, other: 'Expr'):
+        return Compare(operator.or_, self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def isin(self, values: Iterable) -> 'IsIn':
+        return IsIn(self, values)
+
+    def between(self, low, high) -> 'Compare':
+        return (self >= low) & (self <= high)
+
+
+class Column(Expr):
+    def __init__(self, key: int | str):
+        self.key = key
+
+    def __repr__(self):
+        return f'col({self.key!r})'
+
+    def evaluate(self, table: ColumnTable):
+        values = table[self.key]
+        if isinstance(values, StringColumn):
+            np = get_numpy()
+            return np.array([None if value is None else str(value) for value in values], dtype=object)
+        return values
+
+
+class Literal(Expr):
+    def __init__(self, value):
+        # rows compare by their key like DataRow.__eq__ does
+        self.value = int(value) if hasattr(value, 'row_base') else value
+
+    def __repr__(self):
+        return repr(self.value)
+
+    def evaluate(self, table: ColumnTable):
+        return self.value
+
+
+class Compare(Expr):
+    def __init__(self, op: Callable, left: Expr, right: Expr):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return f'({self.left!r} {self.op.__name__} {self.right!r})'
+
+    def evaluate(self, table: ColumnTable):
+        return self.op(self.left.evaluate(table), self.right.evaluate(table))
+
+
+class Not(Expr):
+    def __init__(self, expr: Expr):
+        self.expr = expr
+
+    def __repr__(self):
+        return f'~{self.expr!r}'
+
+    def evaluate(self, table: ColumnTable):
+        return ~self.expr.evaluate(table)
+
+
+class IsIn(Expr):
+    def __init__(self, expr: Expr, values: Iterable):
+        self.expr = expr
+        self.values = [int(value) if hasattr(value, 'row_base') else value for value in values]
+
+    def __repr__(self):
+        return f'{self.expr!r}.isin({self.values!r})'
+
+    def evaluate(self, table: ColumnTable):
+        return get_numpy().isin(self.expr.evaluate(table), self.values)
+
+
+def col(key: int | str) -> Column:
+    """
+    a column by id or by the attribute name of the row type, e.g. col('LevelItem') > 600
+    """
+    return Column(key)
+
+
+class Query:
+    """
+    rows of a sheet matching every predicate; predicates run on the columns of the sheet,
+    only matching rows are built as DataRow, and none at all when columns are selected
+    """
+
+    def __init__(self, sheet: 'Sheet', predicates: tuple[Expr, ...] = (), user_lang: 'Language' = None, columns: tuple = ()):
+        self.sheet = sheet
+        self.predicates = predicates
+        self.user_lang = user_lang
+        self.columns = columns
+        self._indices = None
+
+    def __repr__(self):
+        return f'Query({self.sheet.name}, {" & ".join(map(repr, self.predicates)) or "*"})'
+
+    def where(self, *predicates: Expr) -> 'Query':
+        return Query(self.sheet, self.predicates + predicates, self.user_lang, self.columns)
+
+    def select(self, *columns: int | str) -> 'Query':
+        """
+        iterate tuples of these column values instead of rows
+        """
+        return Query(self.sheet, self.predicates, self.user_lang, columns)
+
+    @property
+    def table(self) -> ColumnTable:
+        return self.sheet.to_columns(self.user_lang)
+
+    def indices(self) -> 'numpy.ndarray':
+        """
+        positions of the matching rows in the column table
+        """
+        if self._indices is None:
+            np = get_numpy()
+            table = self.table
+            mask = np.ones(len(table), bool)
+            for predicate in self.predicates:
+                mask &= predicate.evaluate(table)
+            self._indices = np.flatnonzero(mask)
+        return self._indices
+
+    def keys(self) -> 'numpy.ndarray':
+        return self.table.keys[self.indices()]
+
+    def values(self, column: int | str) -> 'numpy.ndarray | list':
+        values = self.table[column]
+        if isinstance(values, StringColumn):
+            return [values[i] for i in self.indices()]
+        return values[self.indices()]
+
+    def __len__(self):
+        return len(self.indices())
+
+    def __iter__(self) -> Iterator['DataRow | tuple[Any, ...]']:
+        table = self.table
+        indices = self.indices()
+        if not self.columns:
+            return table.iter_rows(int(i) for i in indices)
+        columns = [table[column] for column in self.columns]
+        return (tuple(
+            value[i] if isinstance(value, StringColumn) else value[i].item() for value in columns
+        ) for i in indices)
+
+    def first(self, default=None):
+        return next(iter(self), default)
+
+    def to_list(self) -> list:
+        return list(self)
@@ -1,5 +1,6 @@
 import logging
-from struct import unpack_from
+import operator
+from struct import Struct, unpack_from
 from typing import TYPE_CHECKING, Generic, TypeVar, Callable, Dict, Any
 from fps.utils.sestring import SeString
 
@@ -8,7 +9,7 @@ logger = logging.getLogger('SqPack/ExdReader')
 
 if TYPE_CHECKING:
     from .row import DataRow
-    from .exh import Column
+    from .exh import Column, ExhFile
 
 
 class DataReader(Generic[_T]):
@@ -38,16 +39,35 @@ def bit_field_reader(bit_offset: int):
 
 
 def bytes_reader(buffer: bytearray, row: 'DataRow', col: 'Column'):
-    end_of_fixed = row.row_base.row_offset + row.row_base.sheet.header.header.binary_data_length
+    base = row.row_base
+    end_of_fixed = base.row_offset + base.block_sheet.sheet.header.header.binary_data_length
     # print(buffer[row.row_base.row_offset + col.offset:row.row_base.row_offset + col.offset+4].hex(' '))
-    start = end_of_fixed + unpack_from(">l", buffer, row.row_base.row_offset + col.offset)[0]
+    return bytes_at(buffer, end_of_fixed + unpack_from(">l", buffer, base.row_offset + col.offset)[0], row)
+
+
+def bytes_at(buffer: bytearray, start: int, row: 'DataRow'):
     if start < 0: return None
     # return buffer[BEGIN:buffer.find(b'\0', BEGIN)]
     if (buf := buffer[start:buffer.find(b'\0', start)]).startswith(b'_rsv_'):
-        return row.row_base.sheet.mgr.rsv_string.get(buf.decode('utf-8', errors='ignore'), buf)
+        return row.row_base.block_sheet.sheet.mgr.rsv_string.get(buf.decode('utf-8', errors='ignore'), buf)
     return buf
 
 
+def string_at(buffer: bytearray, start: int, exd_mgr) -> 'SeString | bytes | None':
+    """
+    decode the string starting at an absolute position in an exd buffer, the same value read_data gives for a string column
+    """
+    if start < 0: return None
+    if (buf := buffer[start:buffer.find(b'\0', start)]).startswith(b'_rsv_'):
+        buf = exd_mgr.rsv_string.get(buf.decode('utf-8', errors='ignore'), buf)
+    if buf:
+        try:
+            buf = SeString.loads(buf)
+        except Exception:
+            pass
+    return buf or None
+
+
 def string_reader(buffer: bytearray, row: 'DataRow', col: 'Column'):
     if buf := bytes_reader(buffer, row, col):
         return SeString.from_buffer(buf)
@@ -71,21 +91,108 @@ for i in range(0, 8):
     DATA_READERS[0x19 + i] = bit_field_reader(i)
 
 
+def read_string(buffer: bytearray, row: 'DataRow', col: 'Column', start: int):
+    if buf := bytes_at(buffer, start, row):
+        try:
+            buf = SeString.loads(buf)
+        except Exception as e:
+            sheet = row.row_base.block_sheet.sheet
+            exd_mgr = sheet.mgr
+            if not (cache := getattr(exd_mgr, '_sheet_string_decode_warning', None)):
+                exd_mgr._sheet_string_decode_warning = cache = {}
+            col_id = sheet.header.columns.index(col)
+            warn_key = (sheet.name, row.key, col_id)
+            if warn_key not in cache:
+                logger.warning(f"Error in decode string {sheet.name} row {row.key} col {col_id}: {e}, raw=" + buf.hex(' '))
+                cache[warn_key] = True
+    return buf or None
+
+
 def read_data(buffer: bytearray, row: 'DataRow', col: 'Column', type_=None):
     type_ = col.type if type_ is None else type_
     if type_ == 0:  # string
-        if buf := bytes_reader(buffer, row, col):
-            try:
-                buf = SeString.loads(buf)
-            except Exception as e:
-                sheet = row.row_base.sheet
-                exd_mgr = sheet.mgr
-                if not (cache := getattr(exd_mgr, '_sheet_string_decode_warning', None)):
-                    exd_mgr._sheet_string_decode_warning = cache = {}
-                col_id = sheet.header.columns.index(col)
-                warn_key = (sheet.name, row.key, col_id)
-                if warn_key not in cache:
-                    logger.warning(f"Error in decode string {sheet.name} row {row.key} col {col_id}: {e}, raw=" + bytes_reader(buffer, row, col).hex(' '))
-                    cache[warn_key] = True
-        return buf or None
+        base = row.row_base
+        end_of_fixed = base.row_offset + base.block_sheet.sheet.header.header.binary_data_length
+        return read_string(buffer, row, col, end_of_fixed + unpack_from(">l", buffer, base.row_offset + col.offset)[0])
     return DATA_READERS[type_](buffer, row, col)
+
+
+# struct format of the fixed size part of each column type, bool and bit fields read their byte
+ROW_FIELD_FORMATS = {
+    0x0000: 'l',  # offset of the string after the fixed part
+    0x0001: 'B',
+    0x0002: 'b',
+    0x0003: 'B',
+    0x0004: 'h',
+    0x0005: 'H',
+    0x0006: 'l',
+    0x0007: 'L',
+    0x0009: 'f',
+    0x000B: 'q',
+}
+for i in range(0, 8):
+    ROW_FIELD_FORMATS[0x19 + i] = 'B'
+
+
+class RowDecoder:
+    """
+    reads the fixed size part of a whole row with one unpack_from, compiled once per sheet from the exh columns;
+    columns sharing a byte (bit fields) share a field, columns that overlap some other way go through read_data
+    """
+
+    def __init__(self, exh: 'ExhFile'):
+        self.columns = exh.columns
+        self.row_size = exh.header.binary_data_length
+        fields = {}  # (offset, format) -> field index
+        fmt = ['>']
+        pos = 0
+        field_ids = []
+        self.fallback = []
+        for col_id, col in sorted(enumerate(self.columns), key=lambda item: item[1].offset):
+            if (field_fmt := ROW_FIELD_FORMATS.get(col.type)) is None:
+                self.fallback.append(col_id)
+                continue
+            if (field_id := fields.get((col.offset, field_fmt))) is None:
+                if col.offset < pos:
+                    self.fallback.append(col_id)
+                    continue
+                if col.offset > pos: fmt.append(f'{col.offset - pos}x')
+                fmt.append(field_fmt)
+                pos = col.offset + Struct('>' + field_fmt).size
+                fields[(col.offset, field_fmt)] = field_id = len(fields)
+            field_ids.append((col_id, field_id))
+        self.struct = Struct(''.join(fmt))
+        self.fallback.sort()
+        field_ids = dict(field_ids)
+        # fallback columns take field 0 (or None without any field) in the gathered list, read_data overwrites them
+        if not fields:
+            self._gather = lambda values: [None] * len(self.columns)
+        elif len(self.columns) == 1:
+            self._gather = lambda values: [values[0]]
+        else:
+            getter = operator.itemgetter(*(field_ids.get(col_id, 0) for col_id in range(len(self.columns))))
+            self._gather = lambda values: list(getter(values))
+        self._bits = [
+            (col_id, None if col.type == 0x0001 else col.type - 0x19) for col_id in field_ids
+            if (col := self.columns[col_id]).type == 0x0001 or 0x19 <= col.type < 0x19 + 8
+        ]
+        self._strings = [col_id for col_id in field_ids if self.columns[col_id].type == 0x0000]
+
+    def __repr__(self):
+        return f'RowDecoder({self.struct.format!r}, {len(self.fallback)} fallback columns)'
+
+    def decode(self, row: 'DataRow') -> list:
+        """
+        every column of a row, the same values read_data gives column by column
+        """
+        base = row.row_base
+        buffer = base.block_sheet.buffer
+        res = self._gather(self.struct.unpack_from(buffer, base.row_offset))
+        for col_id, bit in self._bits:
+            res[col_id] = res[col_id] != 0 if bit is None else (res[col_id] >> bit) & 1 > 0
+        end_of_fixed = base.row_offset + self.row_size
+        for col_id in self._strings:
+            res[col_id] = read_string(buffer, row, self.columns[col_id], end_of_fixed + res[col_id])
+        for col_id in self.fallback:
+            res[col_id] = read_data(buffer, row, self.columns[col_id])
+        return res
@@ -6,22 +6,30 @@ if TYPE_CHECKING:
     from .sheet import BlockSheet
 
 _T = TypeVar("_T")
+_missing = object()
 
 
 class RowBase:
+    """
+    location of a row in its block; decoded cells are kept in a list indexed by column id,
+    allocated on first access, with _missing for cells not read yet, and become a tuple once the whole row is decoded
+    """
+    __slots__ = ('block_sheet', 'key', '_offset', 'row_offset', 'row', 'cells', 'links')
     row: 'DataRow|SubDataRow|None'
 
     def __init__(self, block_sheet: 'BlockSheet', key, offset: int, row_offset=0):
-        self.column = block_sheet.columns
-        self.buffer = block_sheet.buffer
-        self.cache = {}
-        self.key = key
-        self.sheet = block_sheet.sheet
-        self.lang_sheet = block_sheet.lang_sheet
         self.block_sheet = block_sheet
+        self.key = key
         self._offset = offset
         self.row_offset = offset + row_offset  # header size
         self.row = None
+        self.cells: list | None = None
+        self.links: dict | None = None  # resolved LinkData values
+
+    column = property(lambda self: self.block_sheet.columns)
+    buffer = property(lambda self: self.block_sheet.buffer)
+    sheet = property(lambda self: self.block_sheet.sheet)
+    lang_sheet = property(lambda self: self.block_sheet.lang_sheet)
 
     def get_row(self, key, type_=None):
         if isinstance(key, str):
@@ -33,15 +41,18 @@ class RowBase:
             else:
                 raise KeyError(key)
         if not isinstance(key, int): raise KeyError(f'not support key type {type(key)}')
-        val = read_data(self.buffer, self.row, self.column[key], type_)
+        block_sheet = self.block_sheet
+        val = read_data(block_sheet.buffer, self.row, block_sheet.columns[key], type_)
         if isinstance(type_, str):
-            sheet = self.sheet.mgr.get_sheet_raw(type_)
-            lang = self.lang_sheet.lang
+            sheet = block_sheet.sheet.mgr.get_sheet_raw(type_)
+            lang = block_sheet.lang_sheet.lang
             val = sheet.get_row(key, lang if lang.value else None)
         return val
 
 
 class DataRow(Generic[_T]):
+    # subclasses should declare __slots__ = () too (generated row types do), or every row gets a __dict__ again
+    __slots__ = ('row_base',)
     _sign: str
     sheet_name: None | str = None
     _display: int | str | None = None
@@ -56,13 +67,32 @@ class DataRow(Generic[_T]):
         self.row_base = base
 
     def __iter__(self):
-        for i in range(len(self.row_base.column)): yield self[i]
+        return iter(self.decode())
+
+    def decode(self) -> tuple:
+        """
+        every column of the row, read with the compiled decoder of the sheet
+        """
+        base = self.row_base
+        if type(cells := base.cells) is tuple: return cells
+        res = base.block_sheet.sheet.row_decoder.decode(self)
+        if cells is not None:  # keep the values already handed out
+            res = [decoded if value is _missing else value for value, decoded in zip(cells, res)]
+        base.cells = res = tuple(res)
+        return res
 
     def __getitem__(self, key: int) -> _T:
-        if key not in self.row_base.cache:
-            if len(self.row_base.column) <= key: return None
-            self.row_base.cache[key] = read_data(self.row_base.buffer, self, self.row_base.column[key])
-        return self.row_base.cache[key]
+        base = self.row_base
+        if isinstance(key, slice): return self.decode()[key]
+        if (cells := base.cells) is None:
+            cells = base.cells = [_missing] * len(base.block_sheet.columns)
+        try:
+            res = cells[key]
+        except IndexError:
+            return None
+        if res is _missing:
+            cells[key] = res = read_data(base.block_sheet.buffer, self, base.block_sheet.columns[key])
+        return res
 
     def __repr__(self):
         if self._display is not None:
@@ -91,29 +121,32 @@ def data_row_impl(cls):
 
 
 class SubDataRow(DataRow, Generic[_T]):
+    __slots__ = ('size', 'count', 'sub_rows')
+
     def __init__(self, base: RowBase):
         super().__init__(base)
+        self.sub_rows = {}
         o = base.row_offset
         self.size, self.count = struct.unpack_from('>lh', base.block_sheet.buffer, base._offset)
         sub_is_data_row = base.sheet.header.header.subkey_count - 1 == len(base.key)
         if sub_is_data_row:
             for _ in range(self.count):
                 _key, = struct.unpack_from(">h", base.buffer, o)
-                base.cache[_key] = base.block_sheet.sheet.row_type(RowBase(base.block_sheet, base.key + (_key,), o + 2, 0))
+                self.sub_rows[_key] = base.block_sheet.sheet.row_type(RowBase(base.block_sheet, base.key + (_key,), o + 2, 0))
                 o += base.sheet.header.header.binary_data_length + 2
         else:
             for _ in range(self.count):
                 _key, = struct.unpack_from(">h", base.buffer, o)
-                _row = base.cache[_key] = SubDataRow(RowBase(base.block_sheet, base.key + (_key,), o + 2, 6))
+                _row = self.sub_rows[_key] = SubDataRow(RowBase(base.block_sheet, base.key + (_key,), o + 2, 6))
                 o += _row.size
 
     def __iter__(self):
         row: _T
-        for row in self.row_base.cache.values():
+        for row in self.sub_rows.values():
             yield row
 
     def __getitem__(self, key: int):
-        return self.row_base.cache[key]
+        return self.sub_rows[key]
 
     def __repr__(self):
         return f"SubDataRow({self.row_base.sheet.name},{self.key},{self.count})"
@@ -1,12 +1,19 @@
 import base64
+import functools
 import struct
 import typing
 import zlib
+from pathlib import Path
 from threading import Lock
 from typing import TYPE_CHECKING, Dict, TypeVar, Generic, Callable
 from collections import namedtuple
 from .exh import ExhFile
+from .reader import RowDecoder
 from .row import make_row, DataRow, data_row_impls
+from .data_row import SimpleData, LinkData, IconData, ColorData
+from .columnar import ColumnTable, build_columns
+from .query import Query, Expr
+from .column_index import ColumnIndex, build_column_index
 
 if TYPE_CHECKING:
     from . import ExdManager, Language
@@ -88,6 +95,8 @@ class LangSheet(Generic[_T]):
         self.row_to_block_sheet_map = {}
         self.range_to_block_sheet_map = {}
         self.is_all_block_initialized = False
+        self._columns: ColumnTable | None = None
+        self._indexes: Dict[int, ColumnIndex] = {}
 
         if not lazy:
             self.check_is_all_block_initialized()
@@ -122,6 +131,16 @@ class LangSheet(Generic[_T]):
             for row_id in _block_sheet.row_offset_map.keys(): self.row_to_block_sheet_map[row_id] = _block_sheet
         return self.range_to_block_sheet_map[block_range]
 
+    def to_columns(self) -> ColumnTable:
+        if self._columns is None:
+            self._columns = build_columns(self)
+        return self._columns
+
+    def build_index(self, col_id: int, cache_dir=None) -> ColumnIndex:
+        if (res := self._indexes.get(col_id)) is None:
+            self._indexes[col_id] = res = build_column_index(self, col_id, cache_dir)
+        return res
+
     def iter_rows(self, condition: Callable[[_T], bool] = None) -> typing.Iterable[_T]:
         self.check_is_all_block_initialized()
         if condition is None:
@@ -168,6 +187,30 @@ class Sheet(Generic[_T]):
             SIGN_DATA_TYPE[col.type] for col in self.header.columns
         ))).decode()
 
+    def get_column_id(self, key: int | str) -> int:
+        """
+        column id of a column id or of a row attribute name of the row type, e.g. 'Icon'
+        """
+        if isinstance(key, int): return key
+        for cls in self.row_type.__mro__:
+            if key in cls.__dict__:
+                if (col_id := getattr(cls.__dict__[key], 'col_id', None)) is not None: return col_id
+                break
+        raise KeyError(f'{key} is not a column of sheet {self.name}')
+
+    @functools.cached_property
+    def row_decoder(self) -> RowDecoder:
+        return RowDecoder(self.header)
+
+    @functools.cached_property
+    def column_names(self) -> Dict[int, str]:
+        res = {}
+        for cls in reversed(self.row_type.__mro__):
+            for name, attr in cls.__dict__.items():
+                if isinstance(attr, (SimpleData, LinkData, IconData, ColorData)):
+                    res.setdefault(attr.col_id, name)
+        return res
+
     def get_min_id(self):
         return min(r.start for r in self.header.blocks)
 
@@ -201,6 +244,31 @@ class Sheet(Generic[_T]):
     def first(self, condition: Callable[[_T], bool], user_lang: 'Language' = None, default: _T2 = None) -> _T | _T2:
         return next(self.get_lang_sheet(user_lang).iter_rows(condition), default)
 
+    def to_columns(self, user_lang: 'Language' = None) -> ColumnTable:
+        """
+        every row as one array per column, built once per language; needs numpy
+        """
+        return self.get_lang_sheet(user_lang).to_columns()
+
+    def to_arrow(self, user_lang: 'Language' = None):
+        return self.to_columns(user_lang).to_arrow()
+
+    def where(self, *predicates: Expr, user_lang: 'Language' = None) -> Query:
+        """
+        vectorized filter, e.g. sheet.where(col('ClassJobCategory') == 5, col('LevelItem') > 600)
+        """
+        return Query(self, predicates, user_lang)
+
+    def build_index(self, column: int | str, user_lang: 'Language' = None, cache_dir: str | Path = None) -> ColumnIndex:
+        """
+        value -> row keys of a column, e.g. sheet.build_index('ClassJobCategory')[5];
+        built once per language and column, and kept in cache_dir (default mgr.index_cache_dir) across runs
+        """
+        if cache_dir is None: cache_dir = self.mgr.index_cache_dir
+        return self.get_lang_sheet(user_lang).build_index(
+            self.get_column_id(column), None if cache_dir is None else Path(cache_dir)
+        )
+
     def __getitem__(self, item):
         return self.get_row(item)
 
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from .pack import PackManager
+from .pack.file.texture_file.processors import get_pil_img
+from .utils import Language, icon_path, get_numpy
+
+if TYPE_CHECKING:
+    from PIL import Image
+    from .exd import Sheet
+
+logger = logging.getLogger('SqPack/IconAtlas')
+
+ATLAS_INDEX_VERSION = 1
+
+
+class AtlasEntry(NamedTuple):
+    page: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class _AtlasPage:
+    # shelf packing: rows of fixed height filled left to right, a new row opens under the last one
+    def __init__(self, size: int, shelves: list[list[int]] = None):
+        self.size = size
+        self.shelves = shelves or []  # [y, height, next_x]
+
+    def allocate(self, width: int, height: int) -> tuple[int, int] | None:
+        for shelf in self.shelves:
+            y, shelf_height, x = shelf
+            if height <= shelf_height and x + width <= self.size:
+                shelf[2] += width
+                return x, y
+        top = self.shelves[-1][0] + self.shelves[-1][1] if self.shelves else 0
+        if top + height > self.size or width > self.size: return None
+        self.shelves.append([top, height, width])
+        return 0, top
+
+
+def icon_ids_in_sheet(sheet: 'Sheet', column: int | str, user_lang: Language = None) -> set[int]:
+    """
+    every non zero icon id referenced by a column of a sheet, column is a column id or a row attribute name;
+    read from the columnar form of the sheet, needs numpy
+    """
+    np = get_numpy()
+    values = sheet.to_columns(user_lang)[column]
+    return set(np.unique(values[values != 0]).tolist())
+
+
+class IconAtlas:
+    """
+    Pack icons into fixed size atlas pages, kept in cache_dir with an id -> (page, rect) index.
+
+    The index remembers where each icon was read from (path, dat file and offset), a later build only decodes icons
+    whose location changed, which is what a patch does to a changed file, and only rewrites the pages they land on.
+    Space of dropped or moved icons is not reclaimed, use rebuild=True to compact.
+    """
+
+    def __init__(
+            self, pack: PackManager, cache_dir: str | Path, page_size=2048, is_hq=False,
+            language: Language | str = None, workers=8
+    ):
+        self.pack = pack
+        self.cache_dir = Path(cache_dir)
+        self.page_size = page_size
+        self.is_hq = is_hq
+        self.language = language.name if isinstance(language, Language) else language
+        self.workers = workers
+        self.entries: dict[int, AtlasEntry] = {}
+        self._sources: dict[int, list] = {}  # icon id -> [path, data_file_id, offset]
+        self._pages: list[_AtlasPage] = []
+        self._saved_pages = 0  # pages below this index have an image in cache_dir
+        self._load_index()
+
+    @property
+    def index_path(self):
+        return self.cache_dir / 'index.json'
+
+    def page_path(self, page: int):
+        return self.cache_dir / f'page_{page}.png'
+
+    def _load_index(self):
+        try:
+            data = json.loads(self.index_path.read_text('utf-8'))
+        except (OSError, ValueError):
+            return
+        if (
+                data.get('version') != ATLAS_INDEX_VERSION or data.get('page_size') != self.page_size or
+                data.get('is_hq') != self.is_hq or data.get('language') != self.language
+        ):
+            return
+        self._pages = [_AtlasPage(self.page_size, shelves) for shelves in data['pages']]
+        self._saved_pages = len(self._pages)
+        for icon_id, (page, x, y, width, height, *source) in data['icons'].items():
+            self.entries[int(icon_id)] = AtlasEntry(page, x, y, width, height)
+            self._sources[int(icon_id)] = source
+
+    def _dump_index(self):
+        temp_path = self.index_path.with_name(f'index.json.{os.getpid()}.tmp')
+        temp_path.write_text(json.dumps({
+            'version': ATLAS_INDEX_VERSION,
+            'page_size': self.page_size,
+            'is_hq': self.is_hq,
+            'language': self.language,
+            'pages': [page.shelves for page in self._pages],
+            'icons': {icon_id: [*entry, *self._sources[icon_id]] for icon_id, entry in self.entries.items()},
+        }), 'utf-8')
+        os.replace(temp_path, self.index_path)
+
+    def _resolve(self, icon_id: int) -> list | None:
+        # same language fallback as IconData_.get_image
+        paths = [icon_path(icon_id, self.is_hq, self.language)]
+        if self.language is not None: paths.append(icon_path(icon_id, self.is_hq))
+        for path in paths:
+            try:
+                info = self.pack.get_file_info(path)
+            except FileNotFoundError:
+                continue
+            return [path, info.data_file_id, info.offset]
+        return None
+
+    def _decode(self, path: str) -> 'Image.Image | None':
+        try:
+            return self.pack.get_texture_file(path).get_image().convert('RGBA')
+        except Exception as e:
+            logger.warning(f'failed to decode {path}: {e}')
+            return None
+
+    def _allocate(self, width: int, height: int) -> AtlasEntry:
+        for i, page in enumerate(self._pages):
+            if pos := page.allocate(width, height):
+                return AtlasEntry(i, *pos, width, height)
+        self._pages.append(page := _AtlasPage(self.page_size))
+        if not (pos := page.allocate(width, height)):
+            raise ValueError(f'icon of {width}x{height} does not fit a {self.page_size} page')
+        return AtlasEntry(len(self._pages) - 1, *pos, width, height)
+
+    def get_page(self, page: int) -> 'Image.Image':
+        return get_pil_img().open(self.page_path(page))
+
+    def get_image(self, icon_id: int) -> 'Image.Image':
+        entry = self.entries[icon_id]
+        return self.get_page(entry.page).crop((entry.x, entry.y, entry.x + entry.width, entry.y + entry.height))
+
+    def build(self, icon_ids: Iterable[int], rebuild=False) -> dict[int, AtlasEntry]:
+        """
+        make sure every icon in icon_ids is in the atlas, returns their entries; icons without a texture are skipped
+        """
+        if rebuild:
+            self.entries.clear()
+            self._sources.clear()
+            self._pages.clear()
+            self._saved_pages = 0
+        requested = {}
+        changed = {}
+        for icon_id in set(icon_ids):
+            if (source := self._resolve(icon_id)) is None: continue
+            requested[icon_id] = source
+            if self._sources.get(icon_id) != source:
+                changed[icon_id] = source
+        if not changed: return {icon_id: self.entries[icon_id] for icon_id in requested}
+
+        with ThreadPoolExecutor(self.workers, 'SqPack/IconAtlas') as executor:
+            images = {
+                icon_id: image for icon_id, image in
+                zip(changed, executor.map(self._decode, (source[0] for source in changed.values())))
+                if image is not None
+            }
+
+        pil_img = get_pil_img()
+        pages: dict[int, Image.Image] = {}
+
+        def open_page(page: int):
+            if page not in pages:
+                if page < self._saved_pages:
+                    pages[page] = pil_img.open(self.page_path(page)).convert('RGBA')
+                else:
+                    pages[page] = pil_img.new('RGBA', (self.page_size, self.page_size))
+            return pages[page]
+
+        # tallest first keeps the shelves tight
+        for icon_id in sorted(images, key=lambda i: images[i].height, reverse=True):
+            image = images[icon_id]
+            old = self.entries.get(icon_id)
+            if old is not None and (old.width, old.height) == image.size:
+                entry = old
+            else:
+                if old is not None:
+                    open_page(old.page).paste((0, 0, 0, 0), (old.x, old.y, old.x + old.width, old.y + old.height))
+                entry = self._allocate(*image.size)
+            open_page(entry.page).paste(image, (entry.x, entry.y))
+            self.entries[icon_id] = entry
+            self._sources[icon_id] = changed[icon_id]
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for page, image in pages.items():
+            image.save(self.page_path(page))
+        self._saved_pages = len(self._pages)
+        self._dump_index()
+        logger.debug(f'{len(changed)} icons updated on {len(pages)} pages')
+        return {icon_id: self.entries[icon_id] for icon_id in requested if icon_id in self.entries}
+
+    def build_from_sheet(self, sheet: 'Sheet', column: int | str, user_lang: Language = None, rebuild=False):
+        return self.build(icon_ids_in_sheet(sheet, column, user_lang), rebuild)
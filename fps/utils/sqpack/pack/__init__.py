@@ -1,10 +1,25 @@
-import io
+import enum
+import functools
+import gzip
+import mmap
 import threading
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, Executor
 from pathlib import Path
 from threading import Lock
-from typing import IO
-from .indexfile import Index, FileInfo
-from .file import file_from_stream, TextureFile
+from typing import IO, Iterable, Iterator
+from .indexfile import Index, FileInfo, PathHash, hash_path
+from .utils import _R_BIO, _R_MV
+from .lru import ByteLRUCache
+from .file import file_from_stream, File, TextureFile
+from .batch import plan_runs, iter_runs
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 PACK_TYPE_TO_KEY_MAP = {
     b"common": 0x00,
@@ -66,6 +81,13 @@ class PackIdentifier:
                     number = 0
         return cls(type_key, expansion, number)
 
+    @staticmethod
+    def path_prefix(full_path: bytes):
+        # the leading part of a path that from_path looks at, paths sharing it belong to the same pack
+        type_sep = full_path.find(b'/')
+        exp_sep = full_path.find(b'/', type_sep + 1)
+        return full_path[:exp_sep + 4] if exp_sep > type_sep else full_path[:type_sep + 1]
+
     def index_file_path(self, data_directory: Path):
         return data_directory.joinpath(
             self.expansion_str,
@@ -85,13 +107,61 @@ class PackIdentifier:
         )
 
 
-class _R_BIO(io.BytesIO):
-    def writable(self): return False
+PATH_CACHE_SIZE = 0x10000
+NAMES_BATCH_SIZE = 0x10000
+_unloaded = object()
+
+
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def resolve_path(path: str | bytes) -> tuple[PackIdentifier, PathHash]:
+    """
+    pack identifier and index hashes of a full path, the most recently used paths are memoized
+    """
+    path_hash = hash_path(path)
+    return PackIdentifier.from_path(path_hash.path), path_hash
+
+
+def iter_hash_paths(paths: Iterable[str | bytes], skip_invalid=False) -> Iterator[tuple[PackIdentifier, PathHash]]:
+    """
+    bulk version of resolve_path that bypasses the lru cache and consumes paths lazily,
+    directory hashes and pack identifiers are shared by every path of the stream;
+    with skip_invalid, paths outside of any known pack type are dropped instead of raising
+    """
+    dir_hashes: dict[bytes, int] = {}
+    pack_ids: dict[bytes, PackIdentifier | None] = {}
+    for path in paths:
+        path_hash = hash_path(path, dir_hashes)
+        if (pack_id := pack_ids.get(prefix := PackIdentifier.path_prefix(path_hash.path), _unloaded)) is _unloaded:
+            try:
+                pack_ids[prefix] = pack_id = PackIdentifier.from_path(prefix)
+            except AssertionError:  # not a sqpack path
+                if not skip_invalid: raise
+                pack_ids[prefix] = pack_id = None
+        if pack_id is not None:
+            yield pack_id, path_hash
+
+
+def hash_paths(paths: Iterable[str | bytes]) -> list[tuple[PackIdentifier, PathHash]]:
+    """
+    bulk version of resolve_path that bypasses the lru cache,
+    directory hashes and pack identifiers are shared by paths within the batch
+    """
+    return list(iter_hash_paths(paths))
+
+
+class IndexMode(enum.IntEnum):
+    both = 0  # .index, falling back to .index2 which is only parsed on the first miss
+    index1 = 1  # only .index
+    index2 = 2  # only .index2
+
 
 
 class Pack:
     """
     Class for a SqPack.
+
+    String paths can be resolved by either index file, so a pack opened with a single index mode
+    keeps one lookup structure and costs one index parse; only integer keys are specific to an index.
     """
 
     @property
@@ -104,7 +174,20 @@ class Pack:
         self._keep_in_memory = value
         if not value: self._buffers.clear()
 
-    def __init__(self, data_directory: str | bytes | Path, _id: PackIdentifier):
+    @property
+    def mmap_data(self):
+        return self._mmap_data
+
+    @mmap_data.setter
+    def mmap_data(self, value):
+        if value == self.mmap_data: return
+        self._mmap_data = value
+        self._data_streams = threading.local()
+        if not value: self._views.clear()
+
+    def __init__(self, data_directory: str | bytes | Path, _id: PackIdentifier, index_cache_dir: Path | None = None, mmap_data=False,
+                 decompress_executor: Executor | None = None, file_cache: ByteLRUCache | None = None,
+                 index_mode: IndexMode = IndexMode.both):
         if not isinstance(data_directory, Path):
             data_directory = Path(data_directory)
         if not (data_directory.exists() and data_directory.is_dir()):
@@ -116,15 +199,35 @@ class Pack:
         self._data_streams_lock = Lock()
         self._keep_in_memory = False
         self._buffers: dict[int, bytes] = {}
+        self._mmap_data = mmap_data
+        self._views: dict[int, memoryview] = {}
+        self._dat_offsets: dict[int, array] = {}
+        self.decompress_executor = decompress_executor
+        self.file_cache = file_cache
+        self.index_cache_dir = index_cache_dir
+        self.index_mode = index_mode
+        self._index2 = None if index_mode == IndexMode.index1 else _unloaded
         index_path = self.id.index_file_path(self.data_directory)
-        self.index = Index(self, index_path) if index_path.exists() and index_path.is_file() else None
-        index_path2 = self.id.index2_file_path(self.data_directory)
-        self.index2 = Index(self, index_path2) if index_path2.exists() and index_path2.is_file() else None
+        if index_mode != IndexMode.index2 and index_path.exists() and index_path.is_file():
+            self.index = Index(self, index_path, index_cache_dir)
+        else:
+            self.index = None
+
+    @property
+    def index2(self) -> Index | None:
+        if self._index2 is _unloaded:
+            with self._data_streams_lock:
+                if self._index2 is _unloaded:
+                    index_path2 = self.id.index2_file_path(self.data_directory)
+                    self._index2 = Index(self, index_path2, self.index_cache_dir) if index_path2.exists() and index_path2.is_file() else None
+        return self._index2
 
     def get_data_stream(self, dat_file=0) -> IO[bytes]:
         key = str(dat_file)
         if res := getattr(self._data_streams, key, None): return res
-        if self.keep_in_memory:
+        if self.mmap_data:
+            setattr(self._data_streams, key, res := _R_MV(self.get_data_view(dat_file)))
+        elif self.keep_in_memory:
             if not (_buffers := self._buffers.get(dat_file)):
                 self._buffers[dat_file] = _buffers = self.id.dat_file_path(self.data_directory, dat_file).read_bytes()
             setattr(self._data_streams, key, res := _R_BIO(_buffers))
@@ -133,36 +236,92 @@ class Pack:
         assert res, f'failed to open data stream for {self.id} dat{dat_file}'
         return res
 
+    def get_data_view(self, dat_file=0) -> memoryview:
+        # one read-only map per dat file, shared by every thread
+        if (view := self._views.get(dat_file)) is None:
+            with self._data_streams_lock:
+                if (view := self._views.get(dat_file)) is None:
+                    with self.id.dat_file_path(self.data_directory, dat_file).open('rb') as f:
+                        self._views[dat_file] = view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return view
+
     def __repr__(self):
         _id = self.id
         return f"Pack({_id.type_str}, {_id.expansion_str}, {_id.number})"
 
-    def get_file(self, path_or_key: str | bytes | int):
+    def get_file_info(self, path_or_key: str | bytes | int | PathHash) -> FileInfo:
         file_index: FileInfo | None = None
         if self.index:
             try:
-                file_index = self.index.get_file(path_or_key)
+                if isinstance(path_or_key, PathHash):
+                    file_index = self.index.get_file_by_path_hash(path_or_key)
+                else:
+                    file_index = self.index.get_file(path_or_key)
             except KeyError:
                 pass
         if file_index is None and self.index2:
             try:
-                file_index = self.index2.get_file(path_or_key)
+                if isinstance(path_or_key, PathHash):
+                    file_index = self.index2.get_file_by_path_hash(path_or_key)
+                else:
+                    file_index = self.index2.get_file(path_or_key)
             except KeyError:
                 pass
         if file_index is None:
-            raise FileNotFoundError(f'{path_or_key} is not found')
-        return self.get_file_by_info(file_index)
+            raise FileNotFoundError(f'{path_or_key.path if isinstance(path_or_key, PathHash) else path_or_key} is not found')
+        return file_index
+
+    def get_file(self, path_or_key: str | bytes | int | PathHash):
+        return self.get_file_by_info(self.get_file_info(path_or_key))
+
+    def get_cached_file(self, file_info: FileInfo) -> File | None:
+        if self.file_cache is not None:
+            return self.file_cache.get((self.id, file_info.data_file_id, file_info.offset))
 
     def get_file_by_info(self, file_info: FileInfo):
-        stream = self.get_data_stream(file_info.info.data_file_id)
+        if file := self.get_cached_file(file_info):
+            return file
+        stream = self.get_data_stream(file_info.data_file_id)
         stream.seek(file_info.offset)
         return file_from_stream(file_info, stream)
 
+    def load_names(self, paths: list[PathHash | bytes]) -> int:
+        # hash the paths first (see iter_hash_paths) so both index files reuse the same hashes
+        return sum(index.load_names(paths) for index in (self.index, self.index2) if index is not None)
+
+    def get_dat_offsets(self, dat_file=0) -> 'array[int]':
+        # sorted start offsets of every file stored in a dat file
+        if (offsets := self._dat_offsets.get(dat_file)) is None:
+            # index2 loads under _data_streams_lock too, resolve it before taking the lock
+            index = self.index if self.index is not None else self.index2
+            with self._data_streams_lock:
+                if (offsets := self._dat_offsets.get(dat_file)) is None:
+                    # synonym entries point into the synonym table, not at a file
+                    if np is not None:
+                        values = np.asarray(index.values, np.uint32)
+                        values = values[((values & 1) == 0) & (((values >> 1) & 0b111) == dat_file)]
+                        offsets = array('Q', np.unique((values >> 4).astype(np.uint64) << 7).tobytes())
+                    else:
+                        # duplicates (several keys of one file) are harmless to bisect_right
+                        offsets = array('Q', sorted([
+                            (v >> 4) << 7 for v in index.values if (v & 1) == 0 and (v >> 1) & 0b111 == dat_file
+                        ]))
+                    self._dat_offsets[dat_file] = offsets
+        return offsets
+
+    def get_file_end(self, file_info: FileInfo) -> int:
+        # files are stored back to back, so a file ends where the next one starts
+        offsets = self.get_dat_offsets(file_info.data_file_id)
+        if (i := bisect_right(offsets, file_info.offset)) < len(offsets):
+            return offsets[i]
+        return self.id.dat_file_path(self.data_directory, file_info.data_file_id).stat().st_size
+
 
 class PackManager(object):
     packs: dict[PackIdentifier, Pack]
 
-    def __init__(self, data_directory: str | bytes | Path):
+    def __init__(self, data_directory: str | bytes | Path, index_cache_dir: str | Path | None = None, mmap_data=False, decompress_workers=0,
+                 file_cache_size=0, index_mode: IndexMode = IndexMode.both, parsed_cache_size=0x10000000):
         if isinstance(data_directory, str):
             data_directory = Path(data_directory)
         if isinstance(data_directory, Path):
@@ -171,15 +330,43 @@ class PackManager(object):
         else:
             raise TypeError("data_directory")
         self.data_directory = data_directory
+        self.index_cache_dir = Path(index_cache_dir) if index_cache_dir is not None else None
+        self.mmap_data = mmap_data
+        # blocks of large files are inflated concurrently when decompress_workers > 0
+        self.decompress_executor = ThreadPoolExecutor(decompress_workers, 'SqPack/Decompress') if decompress_workers > 0 else None
+        # decoded files keyed by (pack id, dat file, offset), off unless file_cache_size is given;
+        # a cached File is shared by every caller that reads it, its data_buffer must not be modified
+        self.file_cache = ByteLRUCache(file_cache_size) if file_cache_size else None
+        # objects parsed from files (terrain layer groups, scenes, meshes...), sized by the memory they keep alive;
+        # always on (256 MiB by default) since it replaces the unbounded per SqPack dicts those parsers used to fill
+        self.parsed_cache = ByteLRUCache(parsed_cache_size)
+        self.index_mode = index_mode
         self.packs = {}
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # stop the decompress workers, files read afterwards are inflated on the calling thread
+        if (executor := self.decompress_executor) is not None:
+            self.decompress_executor = None
+            for pack in self.packs.values():
+                pack.decompress_executor = None
+            executor.shutdown()
+
     def get_pack(self, id_or_path: str | bytes | PackIdentifier) -> 'Pack|None':
         if isinstance(id_or_path, str):
             id_or_path = id_or_path.encode('utf-8')
         if isinstance(id_or_path, bytes):
             id_or_path = PackIdentifier.from_path(id_or_path)
         if id_or_path not in self.packs:
-            self.packs[id_or_path] = Pack(self.data_directory, id_or_path)
+            self.packs[id_or_path] = Pack(
+                self.data_directory, id_or_path, self.index_cache_dir, self.mmap_data,
+                self.decompress_executor, self.file_cache, self.index_mode
+            )
         return self.packs[id_or_path]
 
     def get_texture_file(self, path_or_key: str | bytes | int) -> TextureFile:
@@ -187,4 +374,67 @@ class PackManager(object):
         return _file
 
     def get_file(self, path_or_key: str | bytes | int | tuple[str | bytes | int, ...]):
+        if isinstance(path_or_key, (str, bytes)):
+            pack_id, path_hash = resolve_path(path_or_key)
+            return self.get_pack(pack_id).get_file(path_hash)
         return self.get_pack(path_or_key).get_file(path_or_key)
+
+    def get_file_info(self, path: str | bytes) -> FileInfo:
+        # locate a file without reading any of its data
+        pack_id, path_hash = resolve_path(path)
+        return self.get_pack(pack_id).get_file_info(path_hash)
+
+    def load_names(self, paths: Iterable[str | bytes]) -> int:
+        """
+        give real names to hashed entries from a list of full paths, returns the number of matched entries
+
+        paths are consumed in batches of NAMES_BATCH_SIZE, each path is hashed once for both index files of its pack
+        """
+        hashed = iter_hash_paths(paths, skip_invalid=True)
+        matched = 0
+        while batch := list(islice(hashed, NAMES_BATCH_SIZE)):
+            by_pack: dict[PackIdentifier, list[PathHash]] = {}
+            for pack_id, path_hash in batch:
+                by_pack.setdefault(pack_id, []).append(path_hash)
+            for pack_id, path_hashes in by_pack.items():
+                matched += self.get_pack(pack_id).load_names(path_hashes)
+        return matched
+
+    def load_names_file(self, path: str | Path) -> int:
+        """
+        load a path list with one full path per line, e.g. a ResLogger dump, optionally gzip compressed;
+        the file is streamed line by line
+        """
+        path = Path(path)
+        with (gzip.open(path, 'rb') if path.suffix == '.gz' else open(path, 'rb')) as f:
+            return self.load_names(line for line in map(bytes.strip, f) if line)
+
+    def iter_files(self, paths: Iterable[str | bytes], workers=0) -> Iterator[tuple[str | bytes, File]]:
+        """
+        decode many files at once, yields (path, file) in dat order rather than in the given order,
+        files already in the file cache come first
+
+        all paths are resolved before any data is read (raise FileNotFoundError early),
+        then the reads of every pack are grouped by dat file, sorted by offset and coalesced
+        """
+        requested: dict[Pack, dict[FileInfo, list[str | bytes]]] = {}
+        paths = list(paths)
+        for path, (pack_id, path_hash) in zip(paths, hash_paths(paths)):
+            pack = self.get_pack(pack_id)
+            requested.setdefault(pack, {}).setdefault(pack.get_file_info(path_hash), []).append(path)
+        for pack, infos in requested.items():
+            missing = {}
+            for info, info_paths in infos.items():
+                if (file := pack.get_cached_file(info)) is None:
+                    missing[info] = info_paths
+                    continue
+                for path in info_paths:
+                    yield path, file
+            infos = missing
+            for decoded in iter_runs(pack, plan_runs(pack, infos), workers):
+                for info, file in decoded:
+                    for path in infos[info]:
+                        yield path, file
+
+    def get_files(self, paths: Iterable[str | bytes], workers=0) -> dict[str | bytes, File]:
+        return dict(self.iter_files(paths, workers))
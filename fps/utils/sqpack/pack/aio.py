@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from . import PackManager
+from .file import File, TextureFile
+
+
+class AsyncPackManager:
+    """
+    asyncio front end of a PackManager.
+
+    Index parsing, dat reads and inflation all run in an executor so the event loop never blocks on them,
+    concurrent requests for the same path share one load (single flight).
+    Returned files already have their data decoded.
+    """
+
+    def __init__(self, pack_manager: PackManager | str | Path, executor: Executor = None, workers: int = None, **pack_options):
+        self._own_pack_manager = not isinstance(pack_manager, PackManager)
+        self.pack_manager = PackManager(pack_manager, **pack_options) if self._own_pack_manager else pack_manager
+        self._own_executor = executor is None
+        self.executor = ThreadPoolExecutor(workers, 'SqPack/Async') if executor is None else executor
+        self._in_flight: dict[bytes, asyncio.Future] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # loads already started still use the decompress workers of the manager
+        if self._in_flight: await asyncio.wait(list(self._in_flight.values()))
+        self.close()
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._own_pack_manager:
+            self.pack_manager.close()
+
+    def _load(self, path: str | bytes) -> File:
+        file = self.pack_manager.get_file(path)
+        _ = file.data_buffer
+        return file
+
+    async def get_file(self, path: str | bytes) -> File:
+        key = (path.encode('utf-8') if isinstance(path, str) else path).lower()
+        if (future := self._in_flight.get(key)) is None:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self._load, path)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # a cancelled waiter must not cancel the load the other waiters share
+        return await asyncio.shield(future)
+
+    async def get_texture(self, path: str | bytes) -> TextureFile:
+        assert isinstance(_file := await self.get_file(path), TextureFile), f"{path} is not TextureFile but {type(_file)}"
+        return _file
+
+    async def get_files(self, paths: Iterable[str | bytes]) -> dict[str | bytes, File]:
+        paths = list(paths)
+        return dict(zip(paths, await asyncio.gather(*(self.get_file(path) for path in paths))))
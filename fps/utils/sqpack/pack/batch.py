@@ -0,0 +1,85 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple
+
+from .utils import _R_MV
+from .file import file_from_stream, File
+
+if TYPE_CHECKING:
+    from . import Pack
+    from .indexfile import FileInfo
+
+COALESCE_GAP = 0x10000  # files closer than this are read together, the gap is read and dropped
+MAX_RUN_SIZE = 0x1000000  # a single coalesced read never grows past this unless one file is larger
+
+
+class ReadRun(NamedTuple):
+    dat_file: int
+    start: int
+    end: int
+    infos: list['FileInfo']
+
+
+def plan_runs(pack: 'Pack', infos: Iterable['FileInfo']) -> list[ReadRun]:
+    """
+    group file infos by dat file, sort them by offset and merge neighbours into sequential reads
+    """
+    by_dat: dict[int, list['FileInfo']] = {}
+    for info in infos:
+        by_dat.setdefault(info.data_file_id, []).append(info)
+    runs = []
+    for dat_file, group in sorted(by_dat.items()):
+        group.sort(key=lambda i: i.offset)
+        run = None
+        for info in group:
+            end = pack.get_file_end(info)
+            if run is not None and info.offset - run.end <= COALESCE_GAP and end - run.start <= MAX_RUN_SIZE:
+                run.infos.append(info)
+                run = run._replace(end=max(run.end, end))
+                runs[-1] = run
+            else:
+                runs.append(run := ReadRun(dat_file, info.offset, end, [info]))
+    return runs
+
+
+def iter_run_headers(pack: 'Pack', run: ReadRun) -> Iterator[tuple['FileInfo', File, _R_MV]]:
+    """
+    read a run with one read, yields every file with only its header parsed and a stream positioned at its data
+    """
+    stream = pack.get_data_stream(run.dat_file)
+    stream.seek(run.start)
+    run_stream = _R_MV(memoryview(stream.read(run.end - run.start)), run.start)
+    for info in run.infos:
+        run_stream.seek(info.offset)
+        file = file_from_stream(info, run_stream)
+        run_stream.seek(info.offset + file.header.size)
+        yield info, file, run_stream
+
+
+def read_run(pack: 'Pack', run: ReadRun) -> list[tuple['FileInfo', File]]:
+    """
+    read a run with one read and decode every file in it
+    """
+    res = []
+    for info, file, stream in iter_run_headers(pack, run):
+        file.load_data(stream)
+        res.append((info, file))
+    return res
+
+
+def iter_runs(pack: 'Pack', runs: Iterable[ReadRun], workers=0) -> Iterator[list[tuple['FileInfo', File]]]:
+    """
+    decode runs in order, with up to workers runs in flight at once if workers > 0
+    """
+    if workers <= 0:
+        for run in runs:
+            yield read_run(pack, run)
+        return
+    with ThreadPoolExecutor(workers, 'SqPack/Batch') as executor:
+        pending = collections.deque()
+        for run in runs:
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+            pending.append(executor.submit(read_run, pack, run))
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,219 @@
+import collections
+import logging
+import posixpath
+import queue
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator
+
+from .batch import ReadRun, plan_runs, iter_run_headers
+from .file import File
+
+if TYPE_CHECKING:
+    from . import Pack
+    from .indexfile import FileInfo
+
+logger = logging.getLogger('SqPack/Extractor')
+
+
+class ExtractStats:
+    def __init__(self, files_total: int):
+        self.files_total = files_total
+        self.files_done = 0
+        self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_read(self, size: int):
+        with self._lock:
+            self.bytes_read += size
+
+    elapsed = property(lambda self: time.perf_counter() - self.start_time)
+    files_per_second = property(lambda self: self.files_done / (self.elapsed or 1e-9))
+    bytes_per_second = property(lambda self: self.bytes_written / (self.elapsed or 1e-9))
+
+    def __repr__(self):
+        return (
+            f'ExtractStats({self.files_done}/{self.files_total} files, {self.errors} errors, '
+            f'{self.bytes_written / 0x100000:.1f} MiB, {self.files_per_second:.0f} files/s, '
+            f'{self.bytes_per_second / 0x100000:.1f} MiB/s)'
+        )
+
+
+class _MemoryBudget:
+    """
+    byte counter that blocks acquire until enough is released, a single oversized request passes when nothing is held
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def acquire(self, size: int):
+        with self.cond:
+            self.cond.wait_for(lambda: self.closed or self.used == 0 or self.used + size <= self.limit)
+            if self.closed: raise RuntimeError('extraction cancelled')
+            self.used += size
+
+    def release(self, size: int):
+        with self.cond:
+            self.used -= size
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class _PartsReader:
+    # file-like reader over several buffers, so a file made of parts can be streamed into a tar without joining them
+    def __init__(self, parts: Iterable):
+        self.parts = collections.deque(memoryview(part).cast('B') for part in parts if len(part))
+
+    def read(self, size: int = -1):
+        chunks = []
+        while self.parts and size != 0:
+            part = self.parts[0]
+            n = len(part) if size < 0 else min(size, len(part))
+            chunks.append(part[:n])
+            if n == len(part):
+                self.parts.popleft()
+            else:
+                self.parts[0] = part[n:]
+            if size > 0: size -= n
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+
+def member_name(info: 'FileInfo') -> str | None:
+    # relative output path of a file, None if its name is absolute or climbs out with ..
+    name = posixpath.normpath(info.full_path.decode('utf-8', errors='replace'))
+    if posixpath.isabs(name) or name in ('.', '..') or name.startswith('../'): return None
+    return name
+
+
+class PackExtractor:
+    """
+    Dump the files of a pack in one sequential pass over its dat files.
+
+    Files are read in dat offset order through coalesced reads, decoded by a pool of workers and handed
+    to a single writer. Decoded data waiting to be written never exceeds memory_limit bytes, raw reads
+    in flight add at most workers * batch.MAX_RUN_SIZE on top of that.
+
+    Files come out in the order their decoding finishes, which is neither the order of infos nor dat order.
+    Files whose name would land outside the output (absolute, or with .. segments) are skipped and counted as errors.
+    """
+
+    def __init__(
+            self, pack: 'Pack', workers=4, memory_limit=0x10000000,
+            on_progress: Callable[[ExtractStats], None] = None, progress_interval=1.
+    ):
+        self.pack = pack
+        self.workers = max(workers, 1)
+        self.memory_limit = memory_limit
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.stats: ExtractStats | None = None
+
+    def iter_infos(self) -> Iterator['FileInfo']:
+        index = self.pack.index if self.pack.index is not None else self.pack.index2
+        return index.iter_files() if index is not None else iter(())
+
+    def iter_decoded(self, infos: Iterable['FileInfo'] = None) -> Iterator[tuple['FileInfo', File | Exception]]:
+        """
+        yields (info, file) for every file, or (info, exception) if it failed to decode, in completion order
+        (unspecified, use info to match results to requests);
+        the memory of a file is returned to the budget when the consumer asks for the next one
+        """
+        runs = plan_runs(self.pack, self.iter_infos() if infos is None else infos)
+        self.stats = stats = ExtractStats(sum(len(run.infos) for run in runs))
+        budget = _MemoryBudget(self.memory_limit)
+        results = queue.SimpleQueue()
+
+        def decode_run(run: ReadRun):
+            done = 0
+            try:
+                for info, file, stream in iter_run_headers(self.pack, run):
+                    done += 1
+                    size = file.header.file_size
+                    budget.acquire(size)
+                    try:
+                        file.load_data(stream, cache=False)  # do not let a full dump churn the shared cache
+                    except Exception as e:
+                        budget.release(size)
+                        results.put((info, e, 0))
+                    else:
+                        results.put((info, file, size))
+            except Exception as e:
+                for info in run.infos[done:]:
+                    results.put((info, e, 0))
+            stats.add_read(run.end - run.start)
+
+        last_progress = time.perf_counter()
+        with ThreadPoolExecutor(self.workers, 'SqPack/Extractor') as executor:
+            for run in runs:
+                executor.submit(decode_run, run)
+            try:
+                for _ in range(stats.files_total):
+                    info, res, size = results.get()
+                    if isinstance(res, Exception):
+                        stats.errors += 1
+                        logger.warning(f'failed to decode {info}: {res}')
+                    try:
+                        yield info, res
+                    finally:
+                        budget.release(size)
+                    stats.files_done += 1
+                    if self.on_progress and (now := time.perf_counter()) - last_progress >= self.progress_interval:
+                        last_progress = now
+                        self.on_progress(stats)
+            finally:
+                budget.close()
+                executor.shutdown(wait=True, cancel_futures=True)
+        if self.on_progress: self.on_progress(stats)
+
+    def _reject(self, info: 'FileInfo'):
+        self.stats.errors += 1
+        logger.warning(f'skipped {info}: path leaves the output')
+
+    def to_directory(self, dst: str | Path, infos: Iterable['FileInfo'] = None) -> ExtractStats:
+        dst = Path(dst).resolve()
+        for info, file in self.iter_decoded(infos):
+            if isinstance(file, Exception): continue
+            # resolve also catches symlinks already inside dst that point out of it
+            if (name := member_name(info)) is None or not (path := (dst / name).resolve()).is_relative_to(dst) or path == dst:
+                self._reject(info)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'wb') as f:
+                for buffer in file.get_output_buffers():
+                    self.stats.bytes_written += f.write(buffer)
+        return self.stats
+
+    def to_tar(self, dst: str | Path | BinaryIO, infos: Iterable['FileInfo'] = None) -> ExtractStats:
+        """
+        write an uncompressed tar in stream mode, dst can be a path or any writable binary file object
+        """
+        if isinstance(dst, (str, Path)):
+            tar = tarfile.open(dst, 'w|')
+        else:
+            tar = tarfile.open(fileobj=dst, mode='w|')
+        with tar:
+            for info, file in self.iter_decoded(infos):
+                if isinstance(file, Exception): continue
+                if (name := member_name(info)) is None:
+                    self._reject(info)
+                    continue
+                buffers = file.get_output_buffers()
+                tar_info = tarfile.TarInfo(name)
+                tar_info.size = sum(len(buffer) for buffer in buffers)
+                tar.addfile(tar_info, _PartsReader(buffers))
+                self.stats.bytes_written += tar_info.size
+        return self.stats
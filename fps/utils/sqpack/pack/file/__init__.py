@@ -21,4 +21,4 @@ file_handlers = {
 def file_from_stream(info: 'FileInfo', stream: IO) -> File:
     header_size, file_type = struct.unpack(b'<II', stream.read(0x8))
     stream.seek(-8, 1)
-    return file_handlers.get(file_type, File)(info, stream.read(header_size))
+    return file_handlers.get(file_type, File)(info, stream.read(header_size), stream)
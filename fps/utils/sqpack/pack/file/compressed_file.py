@@ -1,8 +1,7 @@
-import io
 import struct
 from nylib import ctype
 
-from .utils import FileCommonHeader, read_data_block, File
+from .utils import FileCommonHeader, read_data_blocks, File
 
 
 class CompressedDataBlockInfo(ctype.Struct):
@@ -27,12 +26,6 @@ class CompressedFile(File[FileCompressedData]):
 
     def get_data_buffer(self, stream):
         data_pos = stream.tell()
-        with io.BytesIO() as data_stream:
-            for i in range(self.header.number_of_compressed_data_block_info):
-                offset, compressed_size, uncompressed_size = struct.unpack_from(
-                    f'<IHH', self.header_buffer,
-                    COMPRESSED_DATA_BLOCK_INFO_OFFSET + i * COMPRESSED_DATA_BLOCK_INFO_SIZE
-                )  # CompressedDataBlockInfo
-                stream.seek(data_pos + offset)
-                read_data_block(stream, data_stream)
-            return bytearray(data_stream.getvalue())
+        return read_data_blocks(stream, (data_pos + struct.unpack_from(
+            '<I', self.header_buffer, COMPRESSED_DATA_BLOCK_INFO_OFFSET + i * COMPRESSED_DATA_BLOCK_INFO_SIZE
+        )[0] for i in range(self.header.number_of_compressed_data_block_info)), self.decompress_executor)
@@ -0,0 +1,203 @@
+import enum
+import functools
+import struct
+
+from nylib import ctype
+
+from ..utils import FileCommonHeader, File, read_data_blocks
+from .mdl import MdlLayout, VertexElement, VertexUsage, VERTEX_TYPE_FORMATS, get_numpy
+
+
+class FileModel(FileCommonHeader):
+    _size_ = 0XD4
+
+    version = ctype.SField(ctype.c_uint32, 0X14)
+    stack_memory_size = ctype.SField(ctype.c_uint32, 0X18)
+    runtime_memory_size = ctype.SField(ctype.c_uint32, 0X1C)
+    vertex_buffer_size = ctype.Field(ctype.c_uint32 * 3, 0X20)
+    edge_geometry_vertex_buffer_size = ctype.Field(ctype.c_uint32 * 3, 0X2C)
+    index_buffer_size = ctype.Field(ctype.c_uint32 * 3, 0X38)
+    compressed_stack_memory_size = ctype.SField(ctype.c_uint32, 0X44)
+    compressed_runtime_memory_size = ctype.SField(ctype.c_uint32, 0X48)
+    compressed_vertex_buffer_size = ctype.Field(ctype.c_uint32 * 3, 0X4C)
+    compressed_edge_geometry_vertex_buffer_size = ctype.Field(ctype.c_uint32 * 3, 0X58)
+    compressed_index_buffer_size = ctype.Field(ctype.c_uint32 * 3, 0X64)
+    stack_memory_offset = ctype.SField(ctype.c_uint32, 0X70)
+    runtime_memory_offset = ctype.SField(ctype.c_uint32, 0X74)
+    vertex_buffer_offset = ctype.Field(ctype.c_uint32 * 3, 0X78)
+    edge_geometry_vertex_buffer_offset = ctype.Field(ctype.c_uint32 * 3, 0X84)
+    index_buffer_offset = ctype.Field(ctype.c_uint32 * 3, 0X90)
+    stack_data_block_index = ctype.SField(ctype.c_uint16, 0X9C)
+    runtime_data_block_index = ctype.SField(ctype.c_uint16, 0X9E)
+    vertex_buffer_data_block_index = ctype.Field(ctype.c_uint16 * 3, 0XA0)
+    edge_geometry_vertex_buffer_data_block_index = ctype.Field(ctype.c_uint16 * 3, 0XA6)
+    index_buffer_data_block_index = ctype.Field(ctype.c_uint16 * 3, 0XAC)
+    stack_data_block_num = ctype.SField(ctype.c_uint16, 0XB2)
+    runtime_data_block_num = ctype.SField(ctype.c_uint16, 0XB4)
+    vertex_buffer_data_block_num = ctype.Field(ctype.c_uint16 * 3, 0XB6)
+    edge_geometry_vertex_buffer_data_block_num = ctype.Field(ctype.c_uint16 * 3, 0XBC)
+    index_buffer_data_block_num = ctype.Field(ctype.c_uint16 * 3, 0XC2)
+    vertex_declaration_num = ctype.SField(ctype.c_uint16, 0XC8)
+    material_num = ctype.SField(ctype.c_uint16, 0XCA)
+    lod_num = ctype.SField(ctype.c_uint8, 0XCC)
+    enable_index_buffer_streaming = ctype.SField(ctype.c_int8, 0XCD)
+    enable_edge_geometry = ctype.SField(ctype.c_int8, 0XCE)
+    compressed_block_size = ctype.Field(ctype.c_uint16 * 1, 0XD0)
+
+
+MODEL_BLOCK_SIZE_OFFSET = 0xD0  # FileModel.compressed_block_size, one u16 per data block of every section
+# version, stack size, runtime size, vertex declaration num, material num, vertex offsets, index offsets,
+# vertex sizes, index sizes, lod num, enable index buffer streaming, enable edge geometry
+ModelHeader = struct.Struct('<3I2H12I3Bx')
+
+
+class ModelSection(enum.Enum):
+    stack = 0
+    runtime = 1
+    vertex_buffer = 2
+    edge_geometry_vertex_buffer = 3
+    index_buffer = 4
+
+
+# offset, data block index and data block num fields of each section, the last three have one entry per lod
+_SECTION_FIELDS = {
+    ModelSection.stack: ('stack_memory_offset', 'stack_data_block_index', 'stack_data_block_num'),
+    ModelSection.runtime: ('runtime_memory_offset', 'runtime_data_block_index', 'runtime_data_block_num'),
+    **{section: (f'{section.name}_offset', f'{section.name}_data_block_index', f'{section.name}_data_block_num') for section in (
+        ModelSection.vertex_buffer, ModelSection.edge_geometry_vertex_buffer, ModelSection.index_buffer,
+    )},
+}
+
+
+class ModelFile(File[FileModel]):
+    """
+    Model files store each section (stack, runtime and per lod vertex, edge geometry and index buffers) as its own
+    run of data blocks; a section is only inflated when it is asked for, data_buffer rebuilds the whole mdl file.
+    """
+    header_type = FileModel
+
+    def __init__(self, info, header_data: bytes, stream=None):
+        super().__init__(info, header_data, stream)
+        self._sections: dict[tuple[ModelSection, int], bytearray | memoryview] = {}
+
+    def section_blocks(self, section: ModelSection, lod=0) -> tuple[int, int, int]:
+        """
+        offset from the end of the file header, first data block index and data block count of a section
+        """
+        offset, block_index, block_num = (getattr(self.header, name) for name in _SECTION_FIELDS[section])
+        if section in (ModelSection.stack, ModelSection.runtime): return offset, block_index, block_num
+        if not 0 <= lod < 3: raise IndexError(f'lod {lod} out of range')
+        return offset[lod], block_index[lod], block_num[lod]
+
+    def iter_section_block_positions(self, data_pos: int, section: ModelSection, lod=0):
+        offset, block_index, block_num = self.section_blocks(section, lod)
+        pos = data_pos + offset
+        for _len in struct.unpack_from(f'<{block_num}H', self.header_buffer, MODEL_BLOCK_SIZE_OFFSET + block_index * 2):
+            yield pos
+            pos += _len
+
+    def _read_section(self, stream, data_pos: int, section: ModelSection, lod=0) -> bytearray:
+        if not self.section_blocks(section, lod)[2]: return bytearray()
+        return read_data_blocks(stream, self.iter_section_block_positions(data_pos, section, lod), self.decompress_executor)
+
+    def get_section(self, section: ModelSection, lod=0) -> bytearray | memoryview:
+        """
+        inflated data of one section, blocks of other sections and lods are not read
+        """
+        if section in (ModelSection.stack, ModelSection.runtime): lod = 0
+        if (res := self._sections.get((section, lod))) is None:
+            stream = self.data_stream
+            self._sections[section, lod] = res = self._read_section(stream, stream.tell(), section, lod)
+        return res
+
+    stack_memory = property(lambda self: self.get_section(ModelSection.stack))
+    runtime_memory = property(lambda self: self.get_section(ModelSection.runtime))
+
+    def get_vertex_buffer(self, lod=0):
+        return self.get_section(ModelSection.vertex_buffer, lod)
+
+    def get_edge_geometry_vertex_buffer(self, lod=0):
+        return self.get_section(ModelSection.edge_geometry_vertex_buffer, lod)
+
+    def get_index_buffer(self, lod=0):
+        return self.get_section(ModelSection.index_buffer, lod)
+
+    def get_data_buffer(self, stream):
+        # the mdl file as the game loads it: a 0x44 byte header, stack, runtime, then vertex, edge geometry, index of each lod
+        data_pos = stream.tell()
+        h = self.header
+        parts = [
+            (ModelSection.stack, 0, self._read_section(stream, data_pos, ModelSection.stack)),
+            (ModelSection.runtime, 0, self._read_section(stream, data_pos, ModelSection.runtime)),
+        ]
+        vertex_offsets, index_offsets, vertex_sizes, index_sizes = [0] * 3, [0] * 3, [0] * 3, [0] * 3
+        pos = ModelHeader.size + len(parts[0][2]) + len(parts[1][2])
+        for lod in range(3):
+            for section in (ModelSection.vertex_buffer, ModelSection.edge_geometry_vertex_buffer, ModelSection.index_buffer):
+                if not self.section_blocks(section, lod)[2]: continue
+                buffer = self._read_section(stream, data_pos, section, lod)
+                if section is not ModelSection.edge_geometry_vertex_buffer:
+                    offsets, sizes = (vertex_offsets, vertex_sizes) if section is ModelSection.vertex_buffer else (index_offsets, index_sizes)
+                    offsets[lod] = pos if buffer else 0  # an empty buffer has no offset, as Lumina writes it
+                    sizes[lod] = len(buffer)
+                parts.append((section, lod, buffer))
+                pos += len(buffer)
+        res = bytearray(pos)
+        ModelHeader.pack_into(
+            res, 0, h.version, len(parts[0][2]), len(parts[1][2]), h.vertex_declaration_num, h.material_num,
+            *vertex_offsets, *index_offsets, *vertex_sizes, *index_sizes,
+            h.lod_num, h.enable_index_buffer_streaming & 0xFF, h.enable_edge_geometry & 0xFF
+        )
+        view = memoryview(res)
+        pos = ModelHeader.size
+        for section, lod, buffer in parts:
+            view[pos:pos + len(buffer)] = buffer
+            self._sections[section, lod] = view[pos:pos + len(buffer)]
+            pos += len(buffer)
+        return res
+
+    @functools.cached_property
+    def layout(self) -> MdlLayout:
+        return MdlLayout(self.stack_memory, self.runtime_memory, self.header.vertex_declaration_num)
+
+    def vertex_declaration(self, mesh: int) -> list[VertexElement]:
+        return self.layout.vertex_declarations[mesh]
+
+    def _mesh_lod(self, mesh: int, lod: int | None):
+        return self.layout.mesh_lod(mesh) if lod is None else lod
+
+    def get_vertex_array(self, mesh: int, element: VertexElement, lod: int = None):
+        """
+        numpy view of one vertex element of a mesh over the inflated vertex buffer, shaped (vertex count, components)
+        """
+        np = get_numpy()
+        m = self.layout.meshes[mesh]
+        dtype, components = VERTEX_TYPE_FORMATS[element.type]
+        dtype = np.dtype(dtype)
+        buffer = self.get_vertex_buffer(self._mesh_lod(mesh, lod))
+        return np.ndarray(
+            (m.vertex_count, components), dtype, buffer,
+            m.vertex_buffer_offset[element.stream] + element.offset, (m.vertex_buffer_stride[element.stream], dtype.itemsize)
+        )
+
+    def get_vertex_arrays(self, mesh: int, lod: int = None) -> dict[tuple[VertexUsage, int], 'numpy.ndarray']:
+        """
+        every vertex element of a mesh keyed by (usage, usage index), e.g. (VertexUsage.uv, 1) for the second uv set
+        """
+        return {
+            (VertexUsage(element.usage), element.usage_index): self.get_vertex_array(mesh, element, lod)
+            for element in self.vertex_declaration(mesh)
+        }
+
+    def get_positions(self, mesh: int, lod: int = None):
+        for element in self.vertex_declaration(mesh):
+            if element.usage == VertexUsage.position: return self.get_vertex_array(mesh, element, lod)
+        raise KeyError(f'mesh {mesh} has no position element')
+
+    def get_indices(self, mesh: int, lod: int = None):
+        """
+        numpy view of the uint16 triangle list indices of a mesh over the inflated index buffer
+        """
+        np = get_numpy()
+        m = self.layout.meshes[mesh]
+        return np.frombuffer(self.get_index_buffer(self._mesh_lod(mesh, lod)), '<u2', m.index_count, m.start_index * 2)
@@ -0,0 +1,134 @@
+import enum
+import struct
+from collections import namedtuple
+
+from ....utils import get_numpy
+
+
+class VertexType(enum.IntEnum):
+    single1 = 0x0
+    single2 = 0x1
+    single3 = 0x2
+    single4 = 0x3
+    uint = 0x5
+    byte_float4 = 0x8
+    half2 = 0xD
+    half4 = 0xE
+
+
+class VertexUsage(enum.IntEnum):
+    position = 0x0
+    blend_weights = 0x1
+    blend_indices = 0x2
+    normal = 0x3
+    uv = 0x4
+    tangent2 = 0x5
+    tangent1 = 0x6
+    color = 0x7
+
+
+# numpy dtype and component count of each vertex type, byte_float4 is left as raw bytes (divide by 255 to normalize)
+VERTEX_TYPE_FORMATS = {
+    VertexType.single1: ('<f4', 1),
+    VertexType.single2: ('<f4', 2),
+    VertexType.single3: ('<f4', 3),
+    VertexType.single4: ('<f4', 4),
+    VertexType.uint: ('u1', 4),
+    VertexType.byte_float4: ('u1', 4),
+    VertexType.half2: ('<f2', 2),
+    VertexType.half4: ('<f2', 4),
+}
+
+VertexElement = namedtuple('VertexElement', ['stream', 'offset', 'type', 'usage', 'usage_index'])
+VERTEX_ELEMENT = struct.Struct('<5B3x')
+VERTEX_DECLARATION_SIZE = 17 * VERTEX_ELEMENT.size  # every declaration is padded to 17 elements, stream 0xFF ends it
+
+MdlLod = namedtuple('MdlLod', [
+    'mesh_index',
+    'mesh_count',
+    'model_lod_range',
+    'texture_lod_range',
+    'water_mesh_index',
+    'water_mesh_count',
+    'shadow_mesh_index',
+    'shadow_mesh_count',
+    'terrain_shadow_mesh_index',
+    'terrain_shadow_mesh_count',
+    'vertical_fog_mesh_index',
+    'vertical_fog_mesh_count',
+    'edge_geometry_size',
+    'edge_geometry_data_offset',
+    'polygon_count',
+    'unknown1',
+    'vertex_buffer_size',
+    'index_buffer_size',
+    'vertex_data_offset',
+    'index_data_offset',
+])
+MDL_LOD = struct.Struct('<2H2f8H8I')
+
+MdlMesh = namedtuple('MdlMesh', [
+    'vertex_count',
+    'index_count',
+    'material_index',
+    'submesh_index',
+    'submesh_count',
+    'bone_table_index',
+    'start_index',
+    'vertex_buffer_offset',  # per stream, from the start of the vertex buffer of the lod
+    'vertex_buffer_stride',  # per stream
+    'vertex_stream_count',
+])
+MDL_MESH = struct.Struct('<H2x I4H I3I3B B')
+
+# radius, mesh count, attribute count, submesh count, material count, bone count, bone table count, shape count,
+# shape mesh count, shape value count, lod count, flags1, element id count, terrain shadow mesh count, flags2, ...
+MDL_MODEL_HEADER = struct.Struct('<f9H2BH2B2f2H4B3H6x')
+MDL_ELEMENT_ID_SIZE = 0x20
+MDL_EXTRA_LOD_SIZE = 0x28
+MODEL_FLAGS2_EXTRA_LOD = 0x10
+
+
+def parse_vertex_declarations(stack: bytes | memoryview, count: int) -> list[list[VertexElement]]:
+    res = []
+    for i in range(count):
+        elements = []
+        for offset in range(i * VERTEX_DECLARATION_SIZE, (i + 1) * VERTEX_DECLARATION_SIZE, VERTEX_ELEMENT.size):
+            stream, *rest = VERTEX_ELEMENT.unpack_from(stack, offset)
+            if stream == 0xFF: break
+            elements.append(VertexElement(stream, *rest))
+        res.append(elements)
+    return res
+
+
+class MdlLayout:
+    """
+    the parts of the stack and runtime memory needed to locate mesh data, parsed once per model file
+    """
+
+    def __init__(self, stack: bytes | memoryview, runtime: bytes | memoryview, vertex_declaration_num: int):
+        self.vertex_declarations = parse_vertex_declarations(stack, vertex_declaration_num)
+        string_count, string_size = struct.unpack_from('<2I', runtime, 0)
+        offset = 8 + string_size
+        model_header = MDL_MODEL_HEADER.unpack_from(runtime, offset)
+        mesh_count, lod_count, element_id_count, flags2 = model_header[1], model_header[10], model_header[12], model_header[14]
+        self.lod_count = lod_count
+        offset += MDL_MODEL_HEADER.size + element_id_count * MDL_ELEMENT_ID_SIZE
+        self.lods = [MdlLod._make(MDL_LOD.unpack_from(runtime, offset + i * MDL_LOD.size)) for i in range(3)]
+        offset += 3 * MDL_LOD.size
+        if flags2 & MODEL_FLAGS2_EXTRA_LOD: offset += 3 * MDL_EXTRA_LOD_SIZE
+        self.meshes = []
+        for i in range(mesh_count):
+            values = MDL_MESH.unpack_from(runtime, offset + i * MDL_MESH.size)
+            self.meshes.append(MdlMesh(*values[:7], values[7:10], values[10:13], values[13]))
+
+    def mesh_lod(self, mesh: int) -> int:
+        for lod in range(min(self.lod_count, 3)):
+            l = self.lods[lod]
+            for start, count in (
+                    (l.mesh_index, l.mesh_count), (l.water_mesh_index, l.water_mesh_count),
+                    (l.shadow_mesh_index, l.shadow_mesh_count), (l.terrain_shadow_mesh_index, l.terrain_shadow_mesh_count),
+                    (l.vertical_fog_mesh_index, l.vertical_fog_mesh_count),
+            ):
+                if start <= mesh < start + count: return lod
+        return 0
@@ -1,11 +1,13 @@
-import io
+import itertools
 import struct
+from pathlib import Path
 
 from nylib import ctype
 
-from ..utils import read_data_block, File
-from .utils import FileTexture, TextureHeader, LodBlock
+from ..utils import read_data_blocks, File
+from .utils import FileTexture, TextureHeader, LodBlock, Attribute
 from .processors import process
+from .dds import dds_header, surface_size
 
 HEADER_SIZE = ctype.sizeof(FileTexture)
 TEXTURE_HEADER_SIZE = ctype.sizeof(TextureHeader)
@@ -14,24 +16,109 @@ TEXTURE_HEADER_SIZE = ctype.sizeof(TextureHeader)
 class TextureFile(File[FileTexture]):
     header_type = FileTexture
 
-    def __init__(self, info, header_data: bytes):
-        super().__init__(info, header_data)
-        self.lod_blocks = ctype.cdata_from_buffer(self.header_buffer, LodBlock * self.header.output_lod_num)
-        self.texture_header = ctype.cdata_from_buffer_copy(self.data_stream.read(TEXTURE_HEADER_SIZE), TextureHeader)
+    def __init__(self, info, header_data: bytes, stream=None):
+        super().__init__(info, header_data, stream)
+        self.lod_blocks = ctype.cdata_from_buffer(self.header_buffer, LodBlock * self.header.output_lod_num, HEADER_SIZE)
+        if stream is None: stream = self.data_stream
+        self.texture_header_buffer = bytes(stream.read(TEXTURE_HEADER_SIZE))
+        self.texture_header = ctype.cdata_from_buffer_copy(self.texture_header_buffer, TextureHeader)
+
+    def iter_block_positions(self, pos: int):
+        for _len, in struct.iter_unpack(
+                '<H', self.header_buffer[HEADER_SIZE + ctype.sizeof(self.lod_blocks):]
+        ):
+            if not _len: break
+            yield pos
+            pos += _len
+
+    def iter_lod_block_positions(self, data_pos: int, lod: int):
+        # data_pos is the position right after the file header, comp_offset counts from there
+        block = self.lod_blocks[lod]
+        table_offset = HEADER_SIZE + ctype.sizeof(self.lod_blocks) + block.block_offset * 2
+        pos = data_pos + block.comp_offset
+        for _len, in struct.iter_unpack('<H', self.header_buffer[table_offset:table_offset + block.block_num * 2]):
+            yield pos
+            pos += _len
+
+    def surface_range(self, mip: int) -> tuple[int, int | None]:
+        """
+        start and end of a mip surface in data_buffer, end is None for the last one
+        """
+        th = self.texture_header
+        if not 0 <= mip < th.mip_levels:
+            raise IndexError(f'mip {mip} out of range, texture has {th.mip_levels} mips')
+        start = th.offset_to_surface[mip] - TEXTURE_HEADER_SIZE
+        if mip + 1 < th.mip_levels and (end := th.offset_to_surface[mip + 1]):
+            return start, end - TEXTURE_HEADER_SIZE
+        return start, None
+
+    def get_mip_buffer(self, mip: int) -> memoryview:
+        """
+        data of one mip surface, only the lod blocks that hold it are read and inflated unless data_buffer is loaded
+        """
+        start, end = self.surface_range(mip)
+        if self._data_buffer is not None:
+            return memoryview(self._data_buffer)[start:end]
+        lods = []
+        first_start = lod_start = 0
+        for i, block in enumerate(self.lod_blocks):
+            lod_end = lod_start + block.decomp_size
+            if lod_end > start and (end is None or lod_start < end):
+                if not lods: first_start = lod_start
+                lods.append(i)
+            lod_start = lod_end
+        stream = self.data_stream
+        data_pos = stream.tell()
+        buffer = read_data_blocks(stream, itertools.chain.from_iterable(
+            self.iter_lod_block_positions(data_pos, i) for i in lods
+        ), self.decompress_executor)
+        return memoryview(buffer)[start - first_start:None if end is None else end - first_start]
 
     def get_data_buffer(self, stream):
         stream.seek(TEXTURE_HEADER_SIZE, 1)
-        pos = stream.tell()
-        with io.BytesIO() as data_stream:
-            for _len, in struct.iter_unpack(
-                    '<H', self.header_buffer[HEADER_SIZE + ctype.sizeof(self.lod_blocks):]
-            ):
-                if not _len: break
-                stream.seek(pos)
-                read_data_block(stream, data_stream)
-                pos += _len
-            return bytearray(data_stream.getvalue())
-
-    def get_image(self):
+        return read_data_blocks(stream, self.iter_block_positions(stream.tell()), self.decompress_executor)
+
+    def get_output_buffers(self):
+        return self.texture_header_buffer, self.data_buffer
+
+    def get_image(self, mip=0):
         th = self.texture_header
-        return process(th.format, self.data_buffer, th.width, th.height)
+        return process(th.format, self.get_mip_buffer(mip), max(th.width >> mip, 1), max(th.height >> mip, 1))
+
+    def slice_count(self, mip=0):
+        th = self.texture_header
+        if th.type & Attribute.TEXTURE_TYPE_3D:
+            return max(th.depth >> mip, 1)
+        return max(th.array_size, 1) * (6 if th.type & Attribute.TEXTURE_TYPE_CUBE else 1)
+
+    def iter_dds_chunks(self):
+        """
+        dds header followed by the surface data as stored, no pixel is converted;
+        array and cube slices are reordered from the game's mip major layout to the slice major layout of dds
+        """
+        th = self.texture_header
+        is_volume = bool(th.type & Attribute.TEXTURE_TYPE_3D)
+        mips = range(max(th.mip_levels, 1))
+        yield dds_header(
+            th.format, th.type, th.width, th.height, th.depth if is_volume else 1, th.mip_levels,
+            1 if is_volume else th.array_size
+        )
+        data = memoryview(self.data_buffer)
+        starts = [self.surface_range(mip)[0] for mip in mips]
+        sizes = [surface_size(th.format, th.width >> mip, th.height >> mip) for mip in mips]
+        if is_volume:
+            for mip in mips:
+                yield data[starts[mip]:starts[mip] + sizes[mip] * self.slice_count(mip)]
+        else:
+            for i in range(self.slice_count()):
+                for mip in mips:
+                    start = starts[mip] + i * sizes[mip]
+                    yield data[start:start + sizes[mip]]
+
+    def to_dds(self) -> bytes:
+        return b''.join(self.iter_dds_chunks())
+
+    def save_dds(self, path: str | Path):
+        with open(path, 'wb') as f:
+            for chunk in self.iter_dds_chunks():
+                f.write(chunk)
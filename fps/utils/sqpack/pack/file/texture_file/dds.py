@@ -0,0 +1,113 @@
+import struct
+
+from .utils import TextureFormat, Attribute, FMT_DXT, FMT_BC
+
+DDS_MAGIC = b'DDS '
+# magic, size, flags, height, width, pitch_or_linear_size, depth, mip_map_count, reserved1,
+# pixel format (size, flags, four_cc, bit masks), caps, caps2, caps3, caps4, reserved2
+DDSHeader = struct.Struct('<4s7I44x2I4s20x2I12x')
+# dxgi_format, resource_dimension, misc_flag, array_size, misc_flags2
+DDSHeaderDX10 = struct.Struct('<5I')
+
+DDSD_CAPS = 0x1
+DDSD_HEIGHT = 0x2
+DDSD_WIDTH = 0x4
+DDSD_PITCH = 0x8
+DDSD_PIXELFORMAT = 0x1000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSD_LINEARSIZE = 0x80000
+DDSD_DEPTH = 0x800000
+DDPF_FOURCC = 0x4
+DDSCAPS_COMPLEX = 0x8
+DDSCAPS_TEXTURE = 0x1000
+DDSCAPS_MIPMAP = 0x400000
+DDSCAPS2_CUBEMAP_ALL_FACES = 0x200 | 0xFC00
+DDSCAPS2_VOLUME = 0x200000
+DDS_RESOURCE_MISC_TEXTURECUBE = 0x4
+
+DDS_DIMENSION_TEXTURE1D = 2
+DDS_DIMENSION_TEXTURE2D = 3
+DDS_DIMENSION_TEXTURE3D = 4
+
+# the game keeps 8 bit rgba and the packed 16 bit formats in bgra order
+DXGI_FORMATS = {
+    TextureFormat.R8G8B8A8_UNorm: 87,  # B8G8R8A8_UNORM
+    TextureFormat.R8G8B8X8_UNorm: 88,  # B8G8R8X8_UNORM
+    TextureFormat.R4G4B4A4_UNorm: 115,  # B4G4R4A4_UNORM
+    TextureFormat.R5G5B5A1_UNorm: 86,  # B5G5R5A1_UNORM
+    TextureFormat.L8_UNorm: 61,  # R8_UNORM
+    TextureFormat.A8_UNorm: 65,  # A8_UNORM
+    TextureFormat.R8_UNorm: 61,  # R8_UNORM
+    TextureFormat.R8_INT: 62,  # R8_UINT
+    TextureFormat.R16_INT: 57,  # R16_UINT
+    TextureFormat.R16_FLOAT: 54,  # R16_FLOAT
+    TextureFormat.R16_UNorm: 56,  # R16_UNORM
+    TextureFormat.R32_INT: 42,  # R32_UINT
+    TextureFormat.R32_FLOAT: 41,  # R32_FLOAT
+    TextureFormat.R32G32_FLOAT: 16,  # R32G32_FLOAT
+    TextureFormat.R32G32B32A32_FLOAT: 2,  # R32G32B32A32_FLOAT
+    TextureFormat.R8G8_UNorm: 49,  # R8G8_UNORM
+    TextureFormat.R16G16_FLOAT: 34,  # R16G16_FLOAT
+    TextureFormat.R16G16_UNorm: 35,  # R16G16_UNORM
+    TextureFormat.R16G16B16A16_FLOAT: 10,  # R16G16B16A16_FLOAT
+    TextureFormat.DXT1: 71,  # BC1_UNORM
+    TextureFormat.DXT3: 74,  # BC2_UNORM
+    TextureFormat.DXT5: 77,  # BC3_UNORM
+    TextureFormat.BC5: 83,  # BC5_UNORM
+    TextureFormat.BC7: 98,  # BC7_UNORM
+    TextureFormat.D16: 55,  # D16_UNORM
+    TextureFormat.D24S8: 45,  # D24_UNORM_S8_UINT
+    TextureFormat.SHADOW16: 55,  # D16_UNORM
+    TextureFormat.SHADOW24: 45,  # D24_UNORM_S8_UINT
+}
+
+
+def bits_per_pixel(fmt: int):
+    # the size class nibble of the format id is log2 of the bits per pixel
+    return 1 << ((fmt >> 4) & 0xF)
+
+
+def is_block_compressed(fmt: int):
+    return (fmt >> 12) in (FMT_DXT, FMT_BC)
+
+
+def surface_size(fmt: int, width: int, height: int):
+    """
+    byte size of one slice of a surface, block compressed formats are padded to whole 4x4 blocks
+    """
+    width, height = max(width, 1), max(height, 1)
+    if is_block_compressed(fmt):
+        return ((width + 3) >> 2) * ((height + 3) >> 2) * bits_per_pixel(fmt) * 2
+    return width * height * bits_per_pixel(fmt) >> 3
+
+
+def dds_header(
+        fmt: int, texture_type: Attribute, width: int, height: int, depth: int, mip_levels: int, array_size: int
+) -> bytes:
+    if (dxgi_format := DXGI_FORMATS.get(fmt)) is None:
+        raise NotImplementedError(f'0x{fmt:04X} has no dxgi format')
+    flags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_MIPMAPCOUNT
+    if is_block_compressed(fmt):
+        flags |= DDSD_LINEARSIZE
+        pitch_or_linear_size = surface_size(fmt, width, height)
+    else:
+        flags |= DDSD_PITCH
+        pitch_or_linear_size = (width * bits_per_pixel(fmt) + 7) >> 3
+    caps = DDSCAPS_TEXTURE | (DDSCAPS_COMPLEX | DDSCAPS_MIPMAP if mip_levels > 1 else 0)
+    caps2 = misc_flag = 0
+    dimension = DDS_DIMENSION_TEXTURE2D
+    if texture_type & Attribute.TEXTURE_TYPE_3D:
+        flags |= DDSD_DEPTH
+        caps |= DDSCAPS_COMPLEX
+        caps2 = DDSCAPS2_VOLUME
+        dimension = DDS_DIMENSION_TEXTURE3D
+    elif texture_type & Attribute.TEXTURE_TYPE_CUBE:
+        caps |= DDSCAPS_COMPLEX
+        caps2 = DDSCAPS2_CUBEMAP_ALL_FACES
+        misc_flag = DDS_RESOURCE_MISC_TEXTURECUBE
+    elif texture_type & Attribute.TEXTURE_TYPE_1D:
+        dimension = DDS_DIMENSION_TEXTURE1D
+    return DDSHeader.pack(
+        DDS_MAGIC, 124, flags, height, width, pitch_or_linear_size, max(depth, 1), max(mip_levels, 1),
+        32, DDPF_FOURCC, b'DX10', caps, caps2
+    ) + DDSHeaderDX10.pack(dxgi_format, dimension, misc_flag, max(array_size, 1), 0)
@@ -1,11 +1,16 @@
+import array
 import functools
-import io
 import struct
 import typing
 
 from nylib.utils.pip import required
 from .utils import TextureFormat
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 if typing.TYPE_CHECKING:
     from PIL import Image
 
@@ -20,100 +25,204 @@ def get_pil_img():
     return Image
 
 
+def _unpack_5551(v: int):
+    return bytes((
+        ((v >> 7) & 0xF8) | ((v >> 12) & 0x07),
+        ((v >> 2) & 0xF8) | ((v >> 7) & 0x07),
+        ((v << 3) & 0xF8) | ((v >> 2) & 0x07),
+        0xFF if v & 0x8000 else 0,
+    ))
+
+
+def _unpack_4444(v: int):
+    return bytes((
+        ((v >> 8) & 0x0F) << 4,
+        ((v >> 4) & 0x0F) << 4,
+        ((v) & 0x0F) << 4,
+        ((v >> 12) & 0x0F) << 4,
+    ))
+
+
+@functools.cache
+def _lookup_16(unpack: typing.Callable[[int], bytes]):
+    # pure python fallback: every 16 bit pixel value maps to a precomputed rgba quad
+    return tuple(map(unpack, range(0x10000)))
+
+
+def _rgba_from_16(src: bytes, unpack: typing.Callable[[int], bytes]):
+    (values := array.array('H')).frombytes(src[:len(src) & ~1])
+    return b''.join(map(_lookup_16(unpack).__getitem__, values))
+
+
+def rgba_R5G5B5A1_UNorm(src: bytes) -> bytes:
+    if np is None: return _rgba_from_16(src, _unpack_5551)
+    v = np.frombuffer(src, '<u2', len(src) >> 1)
+    dst = np.empty((v.size, 4), np.uint8)
+    for i, shift in enumerate((10, 5, 0)):
+        c = (v >> shift) & 0x1F
+        dst[:, i] = (c << 3) | (c >> 2)
+    dst[:, 3] = (v >> 15) * 0xFF
+    return dst.tobytes()
+
+
+def rgba_R4G4B4A4_UNorm(src: bytes) -> bytes:
+    if np is None: return _rgba_from_16(src, _unpack_4444)
+    v = np.frombuffer(src, '<u2', len(src) >> 1)
+    dst = np.empty((v.size, 4), np.uint8)
+    for i, shift in enumerate((8, 4, 0, 12)):
+        dst[:, i] = ((v >> shift) & 0x0F) << 4
+    return dst.tobytes()
+
+
+def rgba_R8G8B8A8_UNorm(src: bytes) -> bytes:
+    # stored as bgra in memory
+    size = len(src) & ~3
+    if np is None:
+        dst = bytearray(src[:size])
+        dst[0::4] = src[2:size:4]
+        dst[2::4] = src[0:size:4]
+        return bytes(dst)
+    return np.frombuffer(src, np.uint8, size).reshape(-1, 4)[:, (2, 1, 0, 3)].tobytes()
+
+
+def rgba_L8_UNorm(src: bytes) -> bytes:
+    if np is None:
+        dst = bytearray(b'\xff' * (len(src) * 4))
+        dst[0::4] = dst[1::4] = dst[2::4] = src
+        return bytes(dst)
+    dst = np.full((len(src), 4), 0xFF, np.uint8)
+    dst[:, :3] = np.frombuffer(src, np.uint8)[:, None]
+    return dst.tobytes()
+
+
 def process_R5G5B5A1_UNorm(src: bytes, width: int, height: int):
-    pil_img = get_pil_img()
-    with io.BytesIO() as dst:
-        for v, in struct.iter_unpack('H', src):
-            a = v & 0x8000
-            r = v & 0x7C00
-            g = v & 0x03E0
-            b = v & 0x001F
-            rgb = ((r << 9) | (g << 6) | (b << 3))
-            argb_value = (a * 0x1FE00 | rgb | ((rgb >> 5) & 0x070707))
-            dst.write(bytes((
-                (argb_value >> 16) & 0xFF,
-                (argb_value >> 8) & 0xFF,
-                (argb_value) & 0xFF,
-                (argb_value >> 24) & 0xFF,
-            )))
-        return pil_img.frombytes('RGBA', (width, height), dst.getvalue())
+    return get_pil_img().frombytes('RGBA', (width, height), rgba_R5G5B5A1_UNorm(src))
 
 
 def process_R4G4B4A4_UNorm(src: bytes, width: int, height: int):
-    pil_img = get_pil_img()
-    with io.BytesIO() as dst:
-        for v, in struct.iter_unpack('H', src):
-            dst.write(bytes((
-                ((v >> 8) & 0x0F) << 4,
-                ((v >> 4) & 0x0F) << 4,
-                ((v) & 0x0F) << 4,
-                ((v >> 12) & 0x0F) << 4,
-            )))
-        return pil_img.frombytes('RGBA', (width, height), dst.getvalue())
+    return get_pil_img().frombytes('RGBA', (width, height), rgba_R4G4B4A4_UNorm(src))
 
 
 def process_R8G8B8A8_UNorm(src: bytes, width: int, height: int):
-    pil_img = get_pil_img()
-    with io.BytesIO() as dst:
-        for v, in struct.iter_unpack('L', src):
-            dst.write(bytes((
-                (v >> 16) & 0xFF,
-                (v >> 8) & 0xFF,
-                (v) & 0xFF,
-                (v >> 24) & 0xFF,
-            )))
-        return pil_img.frombytes('RGBA', (width, height), dst.getvalue())
+    return get_pil_img().frombytes('RGBA', (width, height), rgba_R8G8B8A8_UNorm(src))
 
 
 def process_L8_UNorm(src: bytes, width: int, height: int):
-    pil_img = get_pil_img()
-    with io.BytesIO() as dst:
-        for v, in struct.iter_unpack('L', src):
-            r = v & 0xE0
-            g = v & 0x1C
-            b = v & 0x03
-            dst.write(bytes((
-                (r | (r << 3) | (r << 6)) & 0xFF,
-                (g | (g << 3) | (g << 6)) & 0xFF,
-                (b | (b << 2) | (b << 4) | (b << 6)) & 0xFF,
-            )))
-        return pil_img.frombytes('RGB', (width, height), dst.getvalue())
-
-
-def process_DXT1(src: bytes, width: int, height: int):
-    return get_pil_img().open(io.BytesIO(struct.pack(
-        '<4sLLLL56xLL4s20xL16x',
-        b'DDS ', 124, 0x1007, height, width,
-        32, 0x04, b'DXT1', 0x1000
-    ) + src))
-
-
-def process_DXT3(src: bytes, width: int, height: int):
-    return get_pil_img().open(io.BytesIO(struct.pack(
-        '<4sLLLL56xLL4s20xL16x',
-        b'DDS ', 124, 0x1007, height, width,
-        32, 0x04, b'DXT3', 0x1000
-    ) + src))
-
-
-def process_DXT5(src: bytes, width: int, height: int):
-    return get_pil_img().open(io.BytesIO(struct.pack(
-        '<4sLLLL56xLL4s20xL16x',
-        b'DDS ', 124, 0x1007, height, width,
-        32, 0x04, b'DXT5', 0x1000
-    ) + src))
-
+    return get_pil_img().frombytes('RGBA', (width, height), rgba_L8_UNorm(src[:width * height]))
+
+
+def rgba_R8G8B8X8_UNorm(src: bytes) -> bytes:
+    size = len(src) & ~3
+    if np is None:
+        dst = bytearray(b'\xff' * size)
+        dst[0::4] = src[2:size:4]
+        dst[1::4] = src[1:size:4]
+        dst[2::4] = src[0:size:4]
+        return bytes(dst)
+    dst = np.full((size >> 2, 4), 0xFF, np.uint8)
+    dst[:, :3] = np.frombuffer(src, np.uint8, size).reshape(-1, 4)[:, 2::-1]
+    return dst.tobytes()
+
+
+def rgba_A8_UNorm(src: bytes) -> bytes:
+    if np is None:
+        dst = bytearray(b'\xff' * (len(src) * 4))
+        dst[3::4] = src
+        return bytes(dst)
+    dst = np.full((len(src), 4), 0xFF, np.uint8)
+    dst[:, 3] = np.frombuffer(src, np.uint8)
+    return dst.tobytes()
+
+
+def _unorm8(src: bytes, code: str, count: int):
+    # component values of any unorm/float layout scaled to 8 bit, floats are clamped to [0, 1]
+    if np is not None:
+        values = np.frombuffer(src, '<' + code, count)
+        if code == 'B': return values
+        if code == 'H': return (values >> 8).astype(np.uint8)
+        return (np.clip(np.nan_to_num(values.astype(np.float32)), 0., 1.) * 255. + .5).astype(np.uint8)
+    values = struct.unpack_from(f'<{count}{code}', src)
+    if code == 'B': return bytes(values)
+    if code == 'H': return bytes(v >> 8 for v in values)
+    return bytes(int(min(max(v, 0.), 1.) * 255. + .5) if v == v else 0 for v in values)
+
+
+def rgba_from_channels(src: bytes, code: str, channels: int, pixel_count: int) -> bytes:
+    """
+    convert pixels of channels components of struct type code to rgba,
+    a single channel is expanded to gray and two channels fill red and green
+    """
+    values = _unorm8(src, code, pixel_count * channels)
+    if channels == 4:
+        return bytes(values)
+    if np is None:
+        dst = bytearray(b'\0\0\0\xff' * pixel_count)
+        if channels == 1:
+            dst[0::4] = dst[1::4] = dst[2::4] = values
+        else:
+            dst[0::4] = values[0::2]
+            dst[1::4] = values[1::2]
+        return bytes(dst)
+    dst = np.zeros((pixel_count, 4), np.uint8)
+    dst[:, 3] = 0xFF
+    if channels == 1:
+        dst[:, :3] = values[:, None]
+    else:
+        dst[:, :2] = values.reshape(-1, 2)
+    return dst.tobytes()
+
+
+def process_R8G8B8X8_UNorm(src: bytes, width: int, height: int):
+    return get_pil_img().frombytes('RGBA', (width, height), rgba_R8G8B8X8_UNorm(src))
+
+
+def process_A8_UNorm(src: bytes, width: int, height: int):
+    return get_pil_img().frombytes('RGBA', (width, height), rgba_A8_UNorm(src[:width * height]))
+
+
+def channel_processor(code: str, channels: int):
+    def processor(src: bytes, width: int, height: int):
+        return get_pil_img().frombytes('RGBA', (width, height), rgba_from_channels(src, code, channels, width * height))
+
+    return processor
+
+
+def bcn_processor(n: int, mode: str):
+    # feed the blocks to pillow's bcn decoder directly instead of wrapping them in a dds file
+    def processor(src: bytes, width: int, height: int):
+        return get_pil_img().frombytes(mode, (width, height), src, 'bcn', n)
+
+    return processor
+
+
+process_DXT1 = bcn_processor(1, 'RGBA')
+process_DXT3 = bcn_processor(2, 'RGBA')
+process_DXT5 = bcn_processor(3, 'RGBA')
+process_BC5 = bcn_processor(5, 'RGB')
+process_BC7 = bcn_processor(7, 'RGBA')
 
 format_processors: 'typing.Dict[int,typing.Callable[[bytes,int,int],Image.Image]]' = {
     TextureFormat.R5G5B5A1_UNorm: process_R5G5B5A1_UNorm,
     TextureFormat.R4G4B4A4_UNorm: process_R4G4B4A4_UNorm,
     TextureFormat.R8G8B8A8_UNorm: process_R8G8B8A8_UNorm,
-    TextureFormat.A8_UNorm: process_R8G8B8A8_UNorm,
-    TextureFormat.R32_FLOAT: process_R8G8B8A8_UNorm,
+    TextureFormat.R8G8B8X8_UNorm: process_R8G8B8X8_UNorm,
     TextureFormat.L8_UNorm: process_L8_UNorm,
+    TextureFormat.A8_UNorm: process_A8_UNorm,
+    TextureFormat.R8_UNorm: channel_processor('B', 1),
+    TextureFormat.R8G8_UNorm: channel_processor('B', 2),
+    TextureFormat.R16_UNorm: channel_processor('H', 1),
+    TextureFormat.R16G16_UNorm: channel_processor('H', 2),
+    TextureFormat.R16_FLOAT: channel_processor('e', 1),
+    TextureFormat.R16G16_FLOAT: channel_processor('e', 2),
+    TextureFormat.R16G16B16A16_FLOAT: channel_processor('e', 4),
+    TextureFormat.R32_FLOAT: channel_processor('f', 1),
+    TextureFormat.R32G32_FLOAT: channel_processor('f', 2),
+    TextureFormat.R32G32B32A32_FLOAT: channel_processor('f', 4),
     TextureFormat.DXT1: process_DXT1,
     TextureFormat.DXT3: process_DXT3,
     TextureFormat.DXT5: process_DXT5,
+    TextureFormat.BC5: process_BC5,
+    TextureFormat.BC7: process_BC7,
 }
 
 
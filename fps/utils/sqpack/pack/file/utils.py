@@ -1,7 +1,8 @@
 import struct
 import typing
 import zlib
-from typing import IO, TypeVar, TYPE_CHECKING, Any
+from concurrent.futures import Executor
+from typing import IO, TypeVar, TYPE_CHECKING, Any, Iterable
 from nylib import ctype
 
 if TYPE_CHECKING:
@@ -11,6 +12,7 @@ BLOCK_INFO = struct.Struct(f'<IIII')
 BLOCK_INFO_SIZE = BLOCK_INFO.size
 BLOCK_PADDING = 0x80
 COMPRESSION_THRESHOLD = 0x7D00
+PARALLEL_BLOCK_THRESHOLD = 8  # fewer blocks are inflated inline even if an executor is given
 
 
 class FileCommonHeader(ctype.Struct):
@@ -40,13 +42,58 @@ def read_data_block(src: IO[bytes], dst: IO[bytes]):
         dst.write(buffer)
 
 
+def _inflate_block_into(buffer, uncompressed_size: int, dst: memoryview):
+    # zlib can only return new bytes, so each block is inflated into one exactly sized temporary (blocks are at most 16 KiB)
+    # and copied into its place in the file buffer; the file itself is never assembled from a growing stream
+    out = zlib.decompress(buffer, -15, uncompressed_size)
+    if len(out) != uncompressed_size:
+        raise RuntimeError(f'Inflated block is {len(out)} bytes, expected {uncompressed_size}')
+    dst[:] = out
+
+
+def read_data_blocks(src: IO[bytes], positions: Iterable[int], executor: Executor | None = None) -> bytearray:
+    """
+    read every data block at positions and inflate them into one preallocated buffer,
+    concurrently if an executor is given and there are enough blocks
+    """
+    blocks = []
+    total_size = 0
+    for pos in positions:
+        src.seek(pos)
+        size, version, compressed_size, uncompressed_size = BLOCK_INFO.unpack(src.read(BLOCK_INFO_SIZE))  # CompressionBlockInfo16
+        assert size == BLOCK_INFO_SIZE
+        is_compressed = compressed_size < COMPRESSION_THRESHOLD
+        blocks.append((is_compressed, uncompressed_size, src.read(compressed_size if is_compressed else uncompressed_size)))
+        total_size += uncompressed_size
+    if len(blocks) < PARALLEL_BLOCK_THRESHOLD: executor = None
+    res = bytearray(total_size)
+    view = memoryview(res)
+    futures = []
+    offset = 0
+    for is_compressed, uncompressed_size, buffer in blocks:
+        dst = view[offset:offset + uncompressed_size]
+        if not is_compressed:
+            if len(buffer) != uncompressed_size:
+                raise RuntimeError(f'Stored block is {len(buffer)} bytes, expected {uncompressed_size}')
+            dst[:] = buffer
+        elif executor is None:
+            _inflate_block_into(buffer, uncompressed_size, dst)
+        else:
+            futures.append(executor.submit(_inflate_block_into, buffer, uncompressed_size, dst))
+        offset += uncompressed_size
+    for future in futures:
+        future.result()  # raise if the inflated size does not match
+    return res
+
+
 class File(typing.Generic[FileCommonHeader_T]):
     header_type: typing.Type[FileCommonHeader_T] = FileCommonHeader
     header: FileCommonHeader_T
     info: 'FileInfo'
     data: Any
 
-    def __init__(self, info: 'FileInfo', header_data: bytes):
+    def __init__(self, info: 'FileInfo', header_data: bytes, stream: IO | None = None):
+        # stream, if given, is positioned right after the header
         self.info = info
         self.header_buffer = bytearray(header_data)
         self.header = ctype.cdata_from_buffer(self.header_buffer, self.header_type)
@@ -54,16 +101,37 @@ class File(typing.Generic[FileCommonHeader_T]):
         self._data_buffer: bytearray | None = None
 
     def get_data_buffer(self, stream: IO) -> bytearray:
-        return bytearray(stream.read(self.data_size))
+        res = bytearray(self.data_size)
+        stream.readinto(res)
+        return res
 
     @property
     def data_buffer(self) -> bytearray:
         if self._data_buffer is None:
-            self._data_buffer = self.get_data_buffer(self.data_stream)
+            self.load_data(self.data_stream)
+        return self._data_buffer
+
+    def load_data(self, stream: IO, cache=True) -> bytearray:
+        # decode from a stream already positioned at the data, e.g. a coalesced read of several files
+        self._data_buffer = self.get_data_buffer(stream)
+        if cache and (file_cache := self.info.index.pack.file_cache) is not None:
+            file_cache.put(self.cache_key, self, len(self._data_buffer) + len(self.header_buffer))
         return self._data_buffer
 
+    @property
+    def cache_key(self):
+        return self.info.index.pack.id, self.info.data_file_id, self.info.offset
+
+    def get_output_buffers(self) -> tuple[bytes | bytearray, ...]:
+        # the buffers that make up the file as the game sees it, in order
+        return self.data_buffer,
+
+    @property
+    def decompress_executor(self) -> Executor | None:
+        return self.info.index.pack.decompress_executor
+
     @property
     def data_stream(self) -> IO:
-        stream = self.info.dir.index.pack.get_data_stream(self.info.info.data_file_id)
+        stream = self.info.index.pack.get_data_stream(self.info.data_file_id)
         stream.seek(self.info.offset + self.header.size)
         return stream
@@ -1,7 +1,17 @@
+import operator
 import zlib
+from array import array
+from bisect import bisect_left
+from itertools import islice
 from pathlib import Path
-from typing import IO, Type, TYPE_CHECKING
+from typing import IO, TYPE_CHECKING, Iterator, Iterable, Mapping, NamedTuple
 from .structure import *
+from .cache import cache_file_path, load_cache, dump_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 if TYPE_CHECKING:
     from .. import Pack
@@ -12,19 +22,37 @@ def compute_hash_32(s: str | bytes):
     return ~zlib.crc32(s.lower()) & 0xFFFFFFFF
 
 
+class PathHash(NamedTuple):
+    path: bytes
+    dir_path: bytes
+    name: bytes
+    dir_hash: int  # index1 directory key
+    file_hash: int  # index1 file key
+    full_hash: int  # index2 key
+
+
+def hash_path(path: str | bytes, dir_hashes: dict[bytes, int] = None) -> PathHash:
+    # dir_hashes, if given, memoizes directory hashes across calls
+    if isinstance(path, str): path = path.encode('utf-8')
+    dir_path, _, name = path.rpartition(b'/')
+    if dir_hashes is None:
+        dir_hash = compute_hash_32(dir_path)
+    elif (dir_hash := dir_hashes.get(dir_path)) is None:
+        dir_hashes[dir_path] = dir_hash = compute_hash_32(dir_path)
+    return PathHash(path, dir_path, name, dir_hash, compute_hash_32(name), compute_hash_32(path))
+
+
 class FileInfo:
-    def __init__(self, _dir: 'Directory', info: HashTableElem_Hash64 | HashTableElem_Hash32):
+    def __init__(self, index: 'Index', _dir: 'Directory|None', key: int, value: int):
+        # value is the packed word of HashTableElem_Hash64 / HashTableElem_Hash32
+        self.index = index
         self.dir = _dir
-        self.info = info
-        self.offset = self.info.block_offset << 7
-        self.key = info.hash_hoge
-        if _dir.index.is_index1:
-            self.hash = self.key & 0xFFFFFFFF
-        else:
-            self.hash = self.key
-            self.key &= _dir.hash << 32
-        self._name = b'file_hash_%d' % self.hash
-        self.full_path = b'%s/file_hash_%d' % (self.dir.path, self.hash)
+        self.key = key
+        self.is_synonym = value & 1
+        self.data_file_id = (value >> 1) & 0b111
+        self.offset = (value >> 4) << 7
+        self.hash = key & 0xFFFFFFFF
+        self._name = index.names.get(key) or b'file_hash_%d' % self.hash
 
     @property
     def name(self):
@@ -34,7 +62,11 @@ class FileInfo:
     def name(self, name: str | bytes):
         if isinstance(name, str): name = name.encode('utf-8')
         self._name = name
-        self.full_path = b'%s/%s' % (self.dir.path, name)
+
+    @property
+    def full_path(self):
+        if self.dir is None: return self._name  # index2 entries are keyed by full path
+        return b'%s/%s' % (self.dir.path, self._name)
 
     def __repr__(self):
         return f'FileIndex({self.full_path})'
@@ -47,13 +79,41 @@ class FileInfo:
         return self.key == other
 
 
-class Directory:
-    files: dict[int, FileInfo] = {}
+class FileMapping(Mapping[int, FileInfo]):
+    """
+    read only key -> FileInfo view over the sorted key column, nothing is copied;
+    a directory view is keyed by file hash, an index view by full key
+    """
 
-    def __init__(self, index: 'Index', info: DirectoryIndexInfo):
+    def __init__(self, index: 'Index', _dir: 'Directory | None' = None):
         self.index = index
-        self.info = info
-        self.hash = info.dir_hash
+        self.dir = _dir
+        if _dir is None:
+            self.start, self.stop = 0, len(index.keys)
+        else:
+            self.start = bisect_left(index.keys, _dir.hash << 32)
+            self.stop = bisect_left(index.keys, (_dir.hash + 1) << 32, self.start)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self) -> Iterator[int]:
+        keys = self.index.keys
+        if self.dir is None: return iter(keys)
+        return (keys[i] & 0xFFFFFFFF for i in range(self.start, self.stop))
+
+    def __getitem__(self, key: int) -> FileInfo:
+        if not isinstance(key, int): raise KeyError(key)
+        if self.dir is not None:
+            if not 0 <= key <= 0xFFFFFFFF: raise KeyError(key)
+            return self.index.file_at(self.index.find(self.dir.hash << 32 | key), self.dir)
+        return self.index.file_at(self.index.find(key))
+
+
+class Directory:
+    def __init__(self, index: 'Index', dir_hash: int):
+        self.index = index
+        self.hash = dir_hash
         self._path = b'dir_hash_%d' % self.hash
 
     @property
@@ -64,10 +124,11 @@ class Directory:
     def path(self, path: str | bytes):
         if isinstance(path, str):
             path = path.encode('utf-8')
-        if path != self._path:
-            self._path = path
-            for file in self.files.values():
-                file.full_path = b'%s/%s' % (path, file.name)
+        self._path = path
+
+    @property
+    def files(self) -> FileMapping:
+        return FileMapping(self.index, self)
 
     def __hash__(self):
         return self.hash
@@ -80,22 +141,19 @@ class Directory:
     def __repr__(self):
         return f'Directory({self._path.decode()})'
 
-    def build_files(self, stream: IO[bytes], index_data_type: Type[HashTableElem_Hash64 | HashTableElem_Hash32], start_pos=0):
-        if not self.info.size: return
-        stream.seek(start_pos + self.info.offset)
-        el_size = index_data_type._size_
-        self.files = {}
-        for _ in range(self.info.size // el_size):
-            file = FileInfo(self, ctype.cdata_from_buffer_copy(stream.read(el_size), index_data_type))
-            self.files[file.hash] = file
-        return self
+    def iter_files(self) -> Iterator[FileInfo]:
+        keys = self.index.keys
+        start = bisect_left(keys, self.hash << 32)
+        stop = bisect_left(keys, (self.hash + 1) << 32, start)
+        for i in range(start, stop):
+            yield self.index.file_at(i, self)
 
     def get_file(self, name_or_hash: str | bytes | int) -> FileInfo:
         if isinstance(name_or_hash, int):
-            return self.files[name_or_hash]
+            return self.index.file_at(self.index.find(self.hash << 32 | name_or_hash), self)
         if isinstance(name_or_hash, str):
             name_or_hash = name_or_hash.encode('utf-8')
-        file = self.files[compute_hash_32(name_or_hash)]
+        file = self.index.file_at(self.index.find(self.hash << 32 | compute_hash_32(name_or_hash)), self)
         file.name = name_or_hash
         return file
 
@@ -103,25 +161,55 @@ class Directory:
 class Index:
     """
     Class representing the data inside a *.index file.
+
+    The hash table is kept as two parallel array columns sorted by key,
+    lookups are resolved by binary search and FileInfo objects are only created on demand.
+    With a cache_dir the columns are mapped from a pre-parsed cache file when it is still valid.
     """
     synonyms: dict[int, SynonymTableElem_Hash32 | SynonymTableElem_Hash64] = {}
     dirs: dict[int, Directory] = {}
-    files: dict[int, FileInfo] = {}
+    keys: 'array[int] | memoryview'  # sorted, dir_hash << 32 | file_hash for index1, full path hash for index2
+    values: 'array[int] | memoryview'  # packed is_synonym / data_file_id / block_offset
 
-    def __init__(self,pack:'Pack', path_or_stream: IO[bytes] | str | Path):
+    def __init__(self, pack: 'Pack', path_or_stream: IO[bytes] | str | Path, cache_dir: str | Path | None = None):
         self.pack = pack
+        self._file_infos: dict[int, FileInfo] = {}
+        self._cache_buffer = None
+        self.names: dict[int, bytes] = {}  # key -> file name (full path for index2) loaded by load_names
         if isinstance(path_or_stream, (str, Path)):
             with open(path_or_stream, 'rb') as stream:
-                self._load(stream)
+                if cache_dir is None:
+                    self._load(stream)
+                else:
+                    self._load_with_cache(stream, Path(path_or_stream), Path(cache_dir))
         else:
             self._load(path_or_stream)
 
     def _load(self, stream: IO[bytes]):
         start_pos = stream.tell()
+        self._load_header(stream, start_pos)
+        self._load_tables(stream, start_pos)
+
+    def _load_with_cache(self, stream: IO[bytes], path: Path, cache_dir: Path):
+        start_pos = stream.tell()
+        self._load_header(stream, start_pos)
+        stat = path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns, self.index_data_hash, self.is_index1)
+        cache_path = cache_file_path(cache_dir, path)
+        if cached := load_cache(cache_path, signature):
+            self._cache_buffer, self.keys, self.values, dir_hashes = cached
+            self._set_dirs(dir_hashes)
+        else:
+            dir_hashes = self._load_tables(stream, start_pos)
+            dump_cache(cache_path, signature, self.keys, self.values, dir_hashes)
+
+    def _load_header(self, stream: IO[bytes], start_pos: int):
         self.version_info = ctype.cdata_from_buffer_copy(stream.read(ctype.sizeof(VersionInfo)), VersionInfo)
         assert self.version_info.magic_str == b'SqPack', Exception(f'version_info magic_str not pair, got {self.version_info.magic_str}')
         assert self.version_info.size == VersionInfo._size_, Exception('version_info size not pair')
-        self.index_file_info = ctype.cdata_from_buffer_copy(stream.read(ctype.sizeof(IndexFileInfo)), IndexFileInfo)
+        index_file_info_buffer = stream.read(ctype.sizeof(IndexFileInfo))
+        self.index_file_info = ctype.cdata_from_buffer_copy(index_file_info_buffer, IndexFileInfo)
+        self.index_data_hash = bytes(index_file_info_buffer[0x10:0x50])  # IndexFileInfo.index_data_hash
         self.is_index1 = self.index_file_info.index_type != 2
 
         if self.index_file_info.synonym_data_size:
@@ -133,21 +221,105 @@ class Index:
                 synonym = ctype.cdata_from_buffer_copy(stream.read(el_size), synonym_type)
                 self.synonyms[synonym.hash_hoge] = synonym
 
+    def _load_tables(self, stream: IO[bytes], start_pos: int):
+        # HashTableElem_Hash64 is (u64 hash, u32 packed, u32 pad), HashTableElem_Hash32 is (u32 hash, u32 packed)
+        stream.seek(start_pos + self.index_file_info.index_data_offset)
+        table = array('Q' if self.is_index1 else 'I')
+        table.frombytes(stream.read(self.index_file_info.index_data_size))
+        keys, values = table[0::2], table[1::2]
+        if self.is_index1:
+            values = array('I', map((0xFFFFFFFF).__and__, values))
+        if any(map(operator.gt, keys, islice(keys, 1, None))):
+            if np is not None:
+                key_column = np.frombuffer(keys, np.uint64 if self.is_index1 else np.uint32)
+                order = np.argsort(key_column, kind='stable')
+                keys = array(keys.typecode, key_column[order].tobytes())
+                values = array(values.typecode, np.frombuffer(values, np.uint32)[order].tobytes())
+            else:
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                keys = array(keys.typecode, map(keys.__getitem__, order))
+                values = array(values.typecode, map(values.__getitem__, order))
+        self.keys = keys
+        self.values = values
+
+        dir_hashes = array('I')
         if self.index_file_info.dir_index_data_size:
-            self.dirs = {}
-            el_size = ctype.sizeof(DirectoryIndexInfo)
             stream.seek(start_pos + self.index_file_info.dir_index_data_offset)
-            for _ in range(self.index_file_info.dir_index_data_size // el_size):
-                _dir = Directory(self, ctype.cdata_from_buffer_copy(stream.read(el_size), DirectoryIndexInfo))
-                self.dirs[_dir.hash] = _dir
-
-        if self.dirs:
-            self.files = {}
-            index_data_type = HashTableElem_Hash64 if self.is_index1 else HashTableElem_Hash32
-            for _dir in self.dirs.values():
-                _dir.build_files(stream, index_data_type, start_pos)
-                for file in _dir.files.values():
-                    self.files[file.key] = file
+            dir_table = array('I')  # DirectoryIndexInfo is (u32 dir_hash, u32 offset, u32 size, u32 pad)
+            dir_table.frombytes(stream.read(self.index_file_info.dir_index_data_size))
+            dir_hashes = dir_table[0::4]
+        self._set_dirs(dir_hashes)
+        return dir_hashes
+
+    def _set_dirs(self, dir_hashes: Iterable[int]):
+        self.dirs = {dir_hash: Directory(self, dir_hash) for dir_hash in dir_hashes}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def find(self, key: int) -> int:
+        # raise KeyError if not found
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            raise KeyError(key)
+        return i
+
+    def file_at(self, i: int, _dir: Directory = None) -> FileInfo:
+        key = self.keys[i]
+        if (file := self._file_infos.get(key)) is None:
+            if _dir is None and self.is_index1:
+                _dir = self.dirs.get(key >> 32) or self.dirs.setdefault(key >> 32, Directory(self, key >> 32))
+            self._file_infos[key] = file = FileInfo(self, _dir, key, self.values[i])
+        return file
+
+    def iter_files(self) -> Iterator[FileInfo]:
+        for i in range(len(self.keys)):
+            yield self.file_at(i)
+
+    @property
+    def files(self) -> FileMapping:
+        return FileMapping(self)
+
+    def load_names(self, paths: Iterable[PathHash | bytes]) -> int:
+        """
+        assign real names to every entry that matches one of the full paths, returns the number of matched paths
+
+        paths are best given already hashed (see hash_paths), plain paths are hashed here with memoized directory hashes;
+        each key is joined against the sorted key column by binary search
+        """
+        keys = self.keys
+        key_count = len(keys)
+        matched = 0
+        dir_hashes: dict[bytes, int] = {}
+        named_dirs: set[int] = set()
+        for path_hash in paths:
+            if not isinstance(path_hash, PathHash): path_hash = hash_path(path_hash, dir_hashes)
+            if self.is_index1:
+                key = path_hash.dir_hash << 32 | path_hash.file_hash
+                name = path_hash.name
+                if path_hash.dir_hash not in named_dirs:
+                    named_dirs.add(path_hash.dir_hash)
+                    if (_dir := self.dirs.get(path_hash.dir_hash)) is not None: _dir.path = path_hash.dir_path
+            else:
+                key = path_hash.full_hash
+                name = path_hash.path
+            if (i := bisect_left(keys, key)) < key_count and keys[i] == key:
+                matched += 1
+                self.names[key] = name
+                if (file := self._file_infos.get(key)) is not None: file.name = name
+        return matched
+
+    def get_file_by_path_hash(self, path_hash: PathHash) -> FileInfo:
+        # raise KeyError if not found
+        if not self.is_index1:
+            file = self.file_at(self.find(path_hash.full_hash))
+            file.name = path_hash.path
+            return file
+        dir_ = self.dirs[path_hash.dir_hash]
+        dir_.path = path_hash.dir_path
+        file = self.file_at(self.find(path_hash.dir_hash << 32 | path_hash.file_hash), dir_)
+        file.name = path_hash.name
+        return file
 
     def get_directory(self, name_or_hash: str | bytes | int) -> Directory:
         # raise KeyError if not found
@@ -166,8 +338,12 @@ class Index:
             dir_key, file_key = name_or_hash
             return self.get_directory(dir_key).get_file(file_key)
         if isinstance(name_or_hash, int):
-            return self.files[name_or_hash]
+            return self.file_at(self.find(name_or_hash))
         if isinstance(name_or_hash, str):
             name_or_hash = name_or_hash.encode('utf-8')
+        if not self.is_index1:
+            file = self.file_at(self.find(compute_hash_32(name_or_hash)))
+            file.name = name_or_hash
+            return file
         dir_key, file_key = name_or_hash.rsplit(b'/', 1)
         return self.get_directory(dir_key).get_file(file_key)
@@ -0,0 +1,62 @@
+import logging
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Sequence
+
+logger = logging.getLogger('SqPack/IndexCache')
+
+CACHE_MAGIC = b'FPSIDXC1'
+# magic, source size, source mtime_ns, source index_data_hash, is_index1, key count, dir count, reserved
+CacheHeader = struct.Struct('<8sQQ64s4I')
+
+
+def cache_file_path(cache_dir: Path, index_path: Path):
+    return cache_dir / f'{zlib.crc32(str(index_path.absolute()).encode("utf-8")):08x}_{index_path.name}.cache'
+
+
+def load_cache(cache_path: Path, signature: tuple):
+    """
+    map a cache file written by dump_cache, return (mmap, keys, values, dir_hashes) or None if it is missing or stale
+
+    signature is (source size, source mtime_ns, source index_data_hash, is_index1)
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: empty file
+        return None
+    if buffer.size() >= CacheHeader.size:
+        magic, *cached_signature, key_count, dir_count, _ = CacheHeader.unpack_from(buffer)
+        is_index1 = signature[3]
+        key_size = 8 if is_index1 else 4
+        if (
+                magic == CACHE_MAGIC and
+                tuple(cached_signature) == signature and
+                buffer.size() == CacheHeader.size + key_count * (key_size + 4) + dir_count * 4
+        ):
+            view = memoryview(buffer)
+            offset = CacheHeader.size
+            keys = view[offset:(offset := offset + key_count * key_size)].cast('Q' if is_index1 else 'I')
+            values = view[offset:(offset := offset + key_count * 4)].cast('I')
+            dir_hashes = view[offset:offset + dir_count * 4].cast('I')
+            return buffer, keys, values, dir_hashes
+    buffer.close()
+    return None
+
+
+def dump_cache(cache_path: Path, signature: tuple, keys: Sequence[int], values: Sequence[int], dir_hashes: Sequence[int]):
+    temp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(CacheHeader.pack(CACHE_MAGIC, *signature, len(keys), len(dir_hashes), 0))
+            f.write(keys)
+            f.write(values)
+            f.write(dir_hashes)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning(f'failed to write index cache {cache_path}: {e}')
+        temp_path.unlink(missing_ok=True)
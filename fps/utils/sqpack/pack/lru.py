@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_missing = object()
+
+
+class ByteLRUCache:
+    """
+    Thread safe LRU cache capped by the total size of its values instead of their count.
+
+    A capacity of 0 disables the cache, values larger than the capacity are never stored.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return (
+            f'ByteLRUCache({len(self._items)} items, {self.size}/{self.capacity} bytes, '
+            f'hits={self.hits}, misses={self.misses}, evictions={self.evictions})'
+        )
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if (item := self._items.get(key, _missing)) is _missing:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value, size: int):
+        if not self.capacity or size > self.capacity: return
+        with self._lock:
+            if (old := self._items.pop(key, None)) is not None:
+                self.size -= old[1]
+            self._items[key] = value, size
+            self.size += size
+            while self.size > self.capacity:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], tuple[Any, int]]):
+        """
+        factory returns (value, size) and runs outside the lock, concurrent misses may build the value twice
+        """
+        if (value := self.get(key, _missing)) is _missing:
+            value, size = factory()
+            self.put(key, value, size)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
@@ -0,0 +1,45 @@
+import io
+
+
+class _R_BIO(io.BytesIO):
+    def writable(self): return False
+
+
+class _R_MV:
+    """
+    Minimal read-only stream over a shared memoryview, read() returns views instead of copies.
+    base is the absolute position of the view, so a slice of a dat file can be addressed by dat offsets.
+    """
+
+    def __init__(self, view: memoryview, base: int = 0):
+        self.view = view
+        self.base = base
+        self.pos = 0
+
+    def readable(self): return True
+
+    def writable(self): return False
+
+    def seekable(self): return True
+
+    def tell(self):
+        return self.base + self.pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            self.pos += offset
+        elif whence == io.SEEK_END:
+            self.pos = len(self.view) + offset
+        else:
+            self.pos = offset - self.base
+        return self.base + self.pos
+
+    def read(self, size: int = -1) -> memoryview:
+        start = self.pos
+        self.pos = len(self.view) if size is None or size < 0 else min(start + size, len(self.view))
+        return self.view[start:self.pos]
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
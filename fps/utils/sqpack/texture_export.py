@@ -0,0 +1,117 @@
+import dataclasses
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .pack import PackManager
+from .utils import Language, icon_path
+
+logger = logging.getLogger('SqPack/TextureExport')
+
+_worker_pack_manager: PackManager | None = None
+
+
+@dataclasses.dataclass
+class WorkerStats:
+    pid: int
+    files: int = 0
+    missing: int = 0
+    errors: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.
+
+    files_per_second = property(lambda self: self.files / (self.elapsed or 1e-9))
+    bytes_per_second = property(lambda self: self.bytes_written / (self.elapsed or 1e-9))
+
+    def merge(self, other: 'WorkerStats'):
+        self.files += other.files
+        self.missing += other.missing
+        self.errors += other.errors
+        self.bytes_written += other.bytes_written
+        self.elapsed += other.elapsed
+
+
+def _init_worker(data_directory: Path, pack_options: dict):
+    # every process opens its own PackManager, nothing is shared with the parent
+    global _worker_pack_manager
+    _worker_pack_manager = PackManager(data_directory, **pack_options)
+    # pool workers leave through multiprocessing's exit handling, which skips atexit but runs finalizers
+    Finalize(None, _worker_pack_manager.close, exitpriority=0)
+
+
+def _export_shard(paths: list[str], dst: Path, fmt: str, save_options: dict) -> WorkerStats:
+    stats = WorkerStats(os.getpid())
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            image = _worker_pack_manager.get_texture_file(path).get_image()
+        except FileNotFoundError:
+            stats.missing += 1
+            continue
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f'failed to decode {path}: {e}')
+            continue
+        out = dst / f'{path.removesuffix(".tex")}.{fmt}'
+        out.parent.mkdir(parents=True, exist_ok=True)
+        image.save(out, fmt, **save_options)
+        stats.files += 1
+        stats.bytes_written += out.stat().st_size
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+class TextureExporter:
+    """
+    Decode textures to png/webp files on a process pool, each worker decodes and encodes whole files on its own.
+
+    Paths are sharded into chunks of chunk_size, the output keeps the game path with the extension replaced.
+    """
+
+    def __init__(
+            self, data_directory: str | Path, dst: str | Path, fmt='png', processes: int = None, chunk_size=64,
+            save_options: dict = None, **pack_options
+    ):
+        self.data_directory = Path(data_directory)
+        self.dst = Path(dst)
+        self.fmt = fmt.lower()
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.save_options = save_options or {}
+        self.pack_options = pack_options
+
+    def iter_export(self, paths: Iterable[str]) -> Iterator[WorkerStats]:
+        """
+        yields the stats of every finished shard as they complete
+        """
+        paths = list(paths)
+        with ProcessPoolExecutor(
+                self.processes, initializer=_init_worker, initargs=(self.data_directory, self.pack_options)
+        ) as executor:
+            futures = [
+                executor.submit(_export_shard, paths[i:i + self.chunk_size], self.dst, self.fmt, self.save_options)
+                for i in range(0, len(paths), self.chunk_size)
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def export(self, paths: Iterable[str]) -> dict[int, WorkerStats]:
+        """
+        export every path, returns the accumulated stats of each worker process keyed by pid
+        """
+        res: dict[int, WorkerStats] = {}
+        for stats in self.iter_export(paths):
+            if (worker := res.get(stats.pid)) is None:
+                res[stats.pid] = stats
+            else:
+                worker.merge(stats)
+        return res
+
+    def export_icons(
+            self, icon_ids: Iterable[int], is_hq=False, language: Language | str = None
+    ) -> dict[int, WorkerStats]:
+        return self.export(icon_path(icon_id, is_hq, language) for icon_id in icon_ids)
@@ -1,6 +1,10 @@
 import enum
+import functools
+import importlib
 import typing
 
+from nylib.utils.pip import required
+
 
 class Language(enum.IntEnum):
     none = 0
@@ -56,6 +60,25 @@ class EventType(enum.IntEnum):
     EventPathMove = 61
 
 
+def import_required(package: str, purpose: str, module: str = None):
+    # install package on demand through nylib, then import it (module defaults to the package name)
+    required(package)
+    try:
+        return importlib.import_module(module or package)
+    except ImportError:
+        raise ImportError(f'Please install {package} {purpose}')
+
+
+@functools.cache
+def get_numpy():
+    return import_required('numpy', 'for array access')
+
+
+@functools.cache
+def get_pyarrow():
+    return import_required('pyarrow', 'to export arrow tables')
+
+
 def icon_path(icon_id: int, is_hq: bool = False, language: Language | str = None):
     if language is None:
         language = ''
@@ -333,6 +333,7 @@ def parse_define_file(sqpack: SqPack, file_path):
     sheet = sqpack.exd.get_sheet_raw(sheet_name, row_type=DataRow)
     attrs = IndentWriter()
     structs = IndentWriter()
+    attrs.write('__slots__ = ()\n')
     attrs.write(f'_sign = {sheet.get_sign()!r}\n')
     if display_col := define.get('defaultColumn'):
         if isinstance(display_col, str):
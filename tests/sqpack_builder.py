@@ -0,0 +1,133 @@
+"""
+writers for tiny synthetic sqpack files, enough of the format for the readers under test
+"""
+import struct
+import zlib
+from pathlib import Path
+
+from fps.utils.sqpack.pack.indexfile import compute_hash_32
+
+BLOCK_SIZE = 0x4000
+
+
+def pad(data: bytes, align=0x80):
+    return data + b'\0' * (-len(data) % align)
+
+
+def split(data: bytes, size=BLOCK_SIZE):
+    return [data[i:i + size] for i in range(0, len(data), size)] or [b'']
+
+
+def data_block(data: bytes, compress=True):
+    if compress:
+        c = zlib.compressobj(9, zlib.DEFLATED, -15)
+        comp = c.compress(data) + c.flush()
+        return pad(struct.pack('<4I', 16, 0, len(comp), len(data)) + comp)
+    return pad(struct.pack('<4I', 16, 0, 32000, len(data)) + data)
+
+
+def file_header(size: int, file_type: int, decomp_size: int, block_count: int, num: int):
+    header = bytearray(size)
+    struct.pack_into('<6I', header, 0, size, file_type, decomp_size, block_count, block_count, num)
+    return header
+
+
+def texture_file(fmt: int, width: int, height: int, surfaces: list[bytes], lods: list[list[int]], ttype=1 << 23):
+    """
+    packed .tex with one surface per mip, lods lists the mips stored in each lod block range
+    """
+    texture_header = bytearray(0x50)
+    struct.pack_into('<IIHHHBB', texture_header, 0, ttype, fmt, width, height, 1, len(surfaces), 1)
+    offset = len(texture_header)
+    for mip, surface in enumerate(surfaces):
+        struct.pack_into('<I', texture_header, 0x1c + 4 * mip, offset)
+        offset += len(surface)
+    lod_data = [b''.join(surfaces[mip] for mip in mips) for mips in lods]
+    lod_blocks = [[data_block(chunk) for chunk in split(data)] for data in lod_data]
+    block_count = sum(map(len, lod_blocks))
+    header_size = len(pad(b'\0' * (0x18 + 0x14 * len(lods) + 2 * block_count)))
+    header = file_header(header_size, 4, offset, block_count, len(lods))
+    comp_offset = len(texture_header)
+    block_index = 0
+    sizes_offset = 0x18 + 0x14 * len(lods)
+    for lod, (data, blocks) in enumerate(zip(lod_data, lod_blocks)):
+        comp_size = sum(map(len, blocks))
+        struct.pack_into('<5I', header, 0x18 + 0x14 * lod, comp_offset, comp_size, len(data), block_index, len(blocks))
+        for block in blocks:
+            struct.pack_into('<H', header, sizes_offset + 2 * block_index, len(block))
+            block_index += 1
+        comp_offset += comp_size
+    return bytes(header) + bytes(texture_header) + b''.join(map(b''.join, lod_blocks))
+
+
+def write_pack(root: Path, type_key: int, files: dict[str, bytes]):
+    """
+    write the packed files into ffxiv/<type_key>0000.win32 .dat0/.index/.index2 under root
+    """
+    directory = Path(root) / 'ffxiv'
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'{type_key:02x}0000.win32'
+    dat = bytearray(0x800)
+    entries = []
+    for path, data in files.items():
+        entries.append((path.encode(), len(dat)))
+        dat += pad(data)
+    (directory / f'{name}.dat0').write_bytes(dat)
+    for index_type, suffix in ((1, 'index'), (2, 'index2')):
+        header = bytearray(0x800)
+        header[0:6] = b'SqPack'
+        struct.pack_into('<I', header, 0xc, 0x400)
+        if index_type == 1:
+            rows = sorted((compute_hash_32(path.rpartition(b'/')[0]) << 32 | compute_hash_32(path.rpartition(b'/')[2]), offset >> 7 << 4) for path, offset in entries)
+            table = b''.join(struct.pack('<QII', key, value, 0) for key, value in rows)
+            dir_hashes = sorted({key >> 32 for key, _ in rows})
+        else:
+            rows = sorted((compute_hash_32(path), offset >> 7 << 4) for path, offset in entries)
+            table = b''.join(struct.pack('<II', key, value) for key, value in rows)
+            dir_hashes = []
+        dir_table = b''.join(struct.pack('<4I', dir_hash, 0, 0, 0) for dir_hash in dir_hashes)
+        struct.pack_into('<4I', header, 0x400, 0x400, 1, 0x800, len(table))
+        struct.pack_into('<I', header, 0x450, 1)
+        struct.pack_into('<2I', header, 0x4e4, 0x800 + len(table), len(dir_table))
+        struct.pack_into('<I', header, 0x52c, index_type)
+        (directory / f'{name}.{suffix}').write_bytes(bytes(header) + table + dir_table)
+
+
+# (size, compressed size, offset, data block index, data block num) fields of each model section and their lod stride
+MODEL_SECTION_FIELDS = {
+    'stack': ((0x18, 0x44, 0x70, 0x9c, 0xb2), 0),
+    'runtime': ((0x1c, 0x48, 0x74, 0x9e, 0xb4), 0),
+    'vertex_buffer': ((0x20, 0x4c, 0x78, 0xa0, 0xb6), 1),
+    'edge_geometry_vertex_buffer': ((0x2c, 0x58, 0x84, 0xa6, 0xbc), 1),
+    'index_buffer': ((0x38, 0x64, 0x90, 0xac, 0xc2), 1),
+}
+
+
+def model_file(sections: dict[tuple[str, int], bytes], version=0x1000005, vertex_declaration_num=1, material_num=1, lod_num=3):
+    """
+    packed .mdl, sections maps (section name, lod) to the inflated data; stack and runtime only use lod 0,
+    a missing section has no data block while an empty one is stored as a single empty block
+    """
+    order = [('stack', 0), ('runtime', 0)] + [
+        (name, lod) for lod in range(3) for name in ('vertex_buffer', 'edge_geometry_vertex_buffer', 'index_buffer')
+    ]
+    blocks = {key: [data_block(chunk) for chunk in split(sections[key])] if key in sections else [] for key in order}
+    block_count = sum(map(len, blocks.values()))
+    header = file_header(
+        len(pad(b'\0' * (0xd0 + 2 * block_count))), 3, 0x44 + sum(map(len, sections.values())), block_count, version
+    )
+    offset = block_index = 0
+    for (name, lod), section_blocks in blocks.items():
+        (size_at, comp_size_at, offset_at, index_at, num_at), stride = MODEL_SECTION_FIELDS[name]
+        comp_size = sum(map(len, section_blocks))
+        struct.pack_into('<I', header, size_at + 4 * lod * stride, len(sections.get((name, lod), b'')))
+        struct.pack_into('<I', header, comp_size_at + 4 * lod * stride, comp_size)
+        struct.pack_into('<I', header, offset_at + 4 * lod * stride, offset)
+        struct.pack_into('<H', header, index_at + 2 * lod * stride, block_index)
+        struct.pack_into('<H', header, num_at + 2 * lod * stride, len(section_blocks))
+        for block in section_blocks:
+            struct.pack_into('<H', header, 0xd0 + 2 * block_index, len(block))
+            block_index += 1
+        offset += comp_size
+    struct.pack_into('<HHB', header, 0xc8, vertex_declaration_num, material_num, lod_num)
+    return bytes(header) + b''.join(b''.join(section_blocks) for section_blocks in blocks.values())
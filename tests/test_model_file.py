@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from fps.utils.sqpack.pack import PackManager
+from fps.utils.sqpack.pack.file.model_file import ModelHeader, ModelSection
+
+from sqpack_builder import model_file, write_pack
+
+MDL_PATH = 'chara/test/model/test.mdl'
+
+
+@pytest.fixture
+def sections():
+    # lod 1 has no vertex buffer, lod 2 only an empty one; sections over one block exercise the block size table
+    return {
+        ('stack', 0): os.urandom(0x5000),
+        ('runtime', 0): os.urandom(0x300),
+        ('vertex_buffer', 0): os.urandom(0x9000),
+        ('edge_geometry_vertex_buffer', 0): os.urandom(0x200),
+        ('index_buffer', 0): os.urandom(0x1800),
+        ('index_buffer', 1): os.urandom(0x600),
+        ('vertex_buffer', 2): b'',
+    }
+
+
+@pytest.fixture
+def pack_root(tmp_path, sections):
+    write_pack(tmp_path, 4, {MDL_PATH: model_file(sections)})
+    return tmp_path
+
+
+def test_get_section(pack_root, sections):
+    mdl = PackManager(pack_root).get_file(MDL_PATH)
+    for section in ModelSection:
+        for lod in range(3):
+            expected = sections.get((section.name, 0 if section in (ModelSection.stack, ModelSection.runtime) else lod), b'')
+            assert bytes(mdl.get_section(section, lod)) == expected, (section, lod)
+    assert mdl._data_buffer is None
+
+
+def test_get_data_buffer(pack_root, sections):
+    mdl = PackManager(pack_root).get_file(MDL_PATH)
+    data = bytes(mdl.data_buffer)
+    (
+        version, stack_size, runtime_size, _, _, *rest
+    ) = ModelHeader.unpack_from(data)
+    vertex_offsets, index_offsets, vertex_sizes, index_sizes = rest[0:3], rest[3:6], rest[6:9], rest[9:12]
+    assert version == mdl.header.version
+    assert (stack_size, runtime_size) == (len(sections['stack', 0]), len(sections['runtime', 0]))
+    pos = ModelHeader.size
+    assert data[pos:pos + stack_size] == sections['stack', 0]
+    assert data[pos + stack_size:pos + stack_size + runtime_size] == sections['runtime', 0]
+    for lod in range(3):
+        for name, offsets, sizes in (('vertex_buffer', vertex_offsets, vertex_sizes), ('index_buffer', index_offsets, index_sizes)):
+            expected = sections.get((name, lod), b'')
+            assert sizes[lod] == len(expected), (name, lod)
+            if not expected:
+                assert offsets[lod] == 0, (name, lod)
+            else:
+                assert data[offsets[lod]:offsets[lod] + sizes[lod]] == expected, (name, lod)
+    # the edge geometry of lod 0 sits between its vertex and index buffers
+    assert index_offsets[0] == vertex_offsets[0] + vertex_sizes[0] + len(sections['edge_geometry_vertex_buffer', 0])
+    assert len(data) == ModelHeader.size + sum(map(len, sections.values()))
+    # sections read after data_buffer are views over it
+    assert bytes(mdl.get_index_buffer(1)) == sections['index_buffer', 1]
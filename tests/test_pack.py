@@ -0,0 +1,51 @@
+import threading
+from array import array
+
+import pytest
+
+import fps.utils.sqpack.pack as pack_module
+from fps.utils.sqpack.pack import PackManager, IndexMode
+
+from sqpack_builder import write_pack
+
+PATHS = [f'ui/test/file{i}.bin' for i in range(8)]
+
+
+@pytest.fixture
+def pack_root(tmp_path):
+    # the readers under test only look at the index, the dat content does not have to be a packed file
+    write_pack(tmp_path, 6, {path: bytes(0x80 * (i + 1)) for i, path in enumerate(PATHS)})
+    return tmp_path
+
+
+def test_dat_offsets_load_index2(pack_root):
+    pack = PackManager(pack_root, index_mode=IndexMode.index2).get_pack(PATHS[0])
+    res = []
+    thread = threading.Thread(target=lambda: res.append(pack.get_dat_offsets(0)), daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), 'get_dat_offsets did not return'
+    assert list(res[0]) == [0x800 + 0x80 * i * (i + 1) // 2 for i in range(len(PATHS))]
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_dat_offsets_skip_synonyms(pack_root, monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(pack_module, 'np', None)
+    pack = PackManager(pack_root).get_pack(PATHS[0])
+    expected = list(pack.get_dat_offsets(0))
+    pack._dat_offsets.clear()
+    # a synonym entry of dat0 whose upper bits would read as an offset past every file
+    pack.index.values = array('I', [*pack.index.values, 0xfff0 << 4 | 1])
+    assert list(pack.get_dat_offsets(0)) == expected
+
+
+def test_close_stops_decompress_workers(pack_root):
+    with PackManager(pack_root, decompress_workers=2) as pack_manager:
+        executor = pack_manager.decompress_executor
+        pack = pack_manager.get_pack(PATHS[0])
+        assert pack.decompress_executor is executor
+    assert executor._shutdown
+    assert pack_manager.decompress_executor is None and pack.decompress_executor is None
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from fps.utils.sqpack.pack import PackManager
+from fps.utils.sqpack.pack.file.texture_file.processors import process
+from fps.utils.sqpack.pack.file.texture_file.utils import TextureFormat
+
+from sqpack_builder import texture_file, write_pack
+
+WIDTH = HEIGHT = 64
+MIP_LEVELS = 7
+TEX_PATH = 'chara/test/texture/multi_lod.tex'
+
+
+@pytest.fixture
+def surfaces():
+    return [os.urandom(max(WIDTH >> mip, 1) * max(HEIGHT >> mip, 1) * 4) for mip in range(MIP_LEVELS)]
+
+
+@pytest.fixture
+def pack_root(tmp_path, surfaces):
+    # three lods like the game writes them: the top mip, the next one, then the whole tail
+    tex = texture_file(TextureFormat.R8G8B8A8_UNorm, WIDTH, HEIGHT, surfaces, [[0], [1], list(range(2, MIP_LEVELS))])
+    write_pack(tmp_path, 4, {TEX_PATH: tex})
+    return tmp_path
+
+
+def test_lod_blocks(pack_root, surfaces):
+    tex = PackManager(pack_root).get_texture_file(TEX_PATH)
+    assert len(tex.lod_blocks) == 3
+    assert [block.decomp_size for block in tex.lod_blocks] == [
+        len(surfaces[0]), len(surfaces[1]), sum(map(len, surfaces[2:]))
+    ]
+
+
+@pytest.mark.parametrize('mip', range(MIP_LEVELS))
+def test_get_mip_buffer_without_data_buffer(pack_root, surfaces, mip):
+    tex = PackManager(pack_root).get_texture_file(TEX_PATH)
+    assert bytes(tex.get_mip_buffer(mip)) == surfaces[mip]
+    assert tex._data_buffer is None
+
+
+@pytest.mark.parametrize('mip', range(MIP_LEVELS))
+def test_get_image_without_data_buffer(pack_root, surfaces, mip):
+    pytest.importorskip('PIL')
+    tex = PackManager(pack_root).get_texture_file(TEX_PATH)
+    size = max(WIDTH >> mip, 1), max(HEIGHT >> mip, 1)
+    image = tex.get_image(mip)
+    assert tex._data_buffer is None
+    assert image.size == size
+    assert image.tobytes() == process(TextureFormat.R8G8B8A8_UNorm, surfaces[mip], *size).tobytes()
+
+
+def test_data_buffer(pack_root, surfaces):
+    tex = PackManager(pack_root).get_texture_file(TEX_PATH)
+    assert bytes(tex.data_buffer) == b''.join(surfaces)
+    assert bytes(tex.get_mip_buffer(3)) == surfaces[3]